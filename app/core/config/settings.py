@@ -1,11 +1,16 @@
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Literal, Optional
+
 from dotenv import load_dotenv
-from passlib.context import CryptContext
 from pydantic import PostgresDsn, computed_field
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from ..lib.databases import Databases, PostgreSQLDrivers
 
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
 load_dotenv()
 
 
@@ -19,6 +24,27 @@ class DatabaseSettings(BaseSettings):
     USER: str
     PASSWORD: str
     NAME: str
+    # Connection pool of every app process. Each process also holds one LISTEN
+    # connection to the primary, so keep
+    # instances * SERVER_WORKERS * (POOL_SIZE + MAX_OVERFLOW + 1) below its
+    # max_connections, e.g. 4 * (5 + 10 + 1) = 64 of the 100 of docker-compose
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30
+    POOL_RECYCLE: int = 30 * 60
+    POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection by the asyncpg adapter,
+    # set to 0 behind pgbouncer in transaction mode
+    STATEMENT_CACHE_SIZE: int = 100
+    # asyncpg URLs of read replicas as a JSON list, reads go to the primary if empty
+    REPLICA_URLS: List[str] = []
+    # Reads of a client stay on the primary for this long after its last write.
+    # Clients are told apart by X-Client-Id or a cookie set on their first
+    # write, and recognized by every worker with CACHE_BACKEND=redis
+    READ_YOUR_WRITES_SECONDS: float = 5
+    # Direct URL of the primary for LISTEN, needed behind pgbouncer in
+    # transaction mode; the primary settings above are used if empty
+    LISTEN_URL: Optional[str] = None
 
     model_config = SettingsConfigDict(env_prefix="DB_")
 
@@ -74,7 +100,6 @@ class DatabaseSettings(BaseSettings):
 class ApplicationSettings(BaseSettings):
     PRODUCTION: bool
     SITE_URL: str
-    PWD_CONTEXT: CryptContext = CryptContext(schemes=["bcrypt"], deprecated="auto")
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
@@ -82,6 +107,29 @@ class ApplicationSettings(BaseSettings):
     REFRESH_PASSWORD_EXPIRE_MINUTES: int = 10
     VERIFICATION_CODE_EXPIRE_MINUTES: int = 10
     METRICS: bool
+    # Render ticket responses with pydantic-core instead of FastAPI's encoder
+    FAST_SERIALIZATION: bool = False
+    # gzip, or brotli if installed, for responses from the minimum size on
+    COMPRESSION: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    # application/msgpack responses for clients preferring it in Accept
+    MSGPACK: bool = True
+    # Limits of one POST /tickets/bulk request
+    BULK_MAX_ROWS: int = 1000
+    BULK_MAX_BYTES: int = 10 * 1024 * 1024
+    # Change events buffered per /tickets/changes client before it lags
+    CHANGE_FEED_QUEUE_SIZE: int = 256
+    # Comment lines keeping idle event streams open through proxies
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15
+
+    @cached_property
+    def PWD_CONTEXT(self) -> "CryptContext":
+        """Password hashing context, passlib is imported on first use."""
+        from passlib.context import CryptContext
+
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class MailSettings(BaseSettings):
@@ -93,10 +141,113 @@ class MailSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="MAIL_")
 
 
-class Settings(BaseSettings):
-    db: DatabaseSettings = DatabaseSettings()
-    app: ApplicationSettings = ApplicationSettings()
-    mail: MailSettings = MailSettings()
+class LLMSettings(BaseSettings):
+    """OpenAI-compatible endpoint of the support assistant (Ollama by default)"""
+
+    BASE_URL: str = "http://31.128.49.187:11434/v1"
+    API_KEY: str = "ollama"
+    MODEL: str = "llama3.2"
+    TEMPERATURE: float = 0.3
+    # Conversation size (summary and turns) kept per connection, the system
+    # prompt is sent anyway and not counted
+    HISTORY_TOKEN_BUDGET: int = 1536
+    # Summarise trimmed turns instead of dropping them
+    HISTORY_SUMMARY: bool = True
+    SUMMARY_MAX_TOKENS: int = 256
+    # Answers to first questions of a chat, zero size disables the cache
+    CACHE_SIZE: int = 256
+    CACHE_TTL_SECONDS: int = 60 * 60
+    # Generations running at once and chats allowed to wait for a free slot,
+    # per worker process: the server sees SERVER_WORKERS times as many
+    MAX_CONCURRENCY: int = 4
+    MAX_QUEUE: int = 32
+    model_config = SettingsConfigDict(env_prefix="LLM_")
+
+
+class CacheSettings(BaseSettings):
+    """Read-through cache of ticket reads"""
+
+    # memory keeps entries per worker, redis shares them between workers
+    BACKEND: Literal["memory", "redis", "none"] = "memory"
+    MAX_SIZE: int = 10_000
+    # Upper bound on staleness if an invalidation is lost
+    TTL_SECONDS: int = 60
+    REDIS_URL: str = "redis://localhost:6379/0"
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+
+class LogSettings(BaseSettings):
+    """Output of main_logger"""
+
+    LEVEL: str = "DEBUG"
+    # One JSON object per line with request id, route and latency fields
+    JSON: bool = False
+    # Write from a background thread, dropping records while the queue is full
+    QUEUED: bool = True
+    QUEUE_SIZE: int = 10_000
+    # Share of records kept per level, bounds the volume at high request rates
+    SAMPLE_DEBUG: float = 1.0
+    SAMPLE_INFO: float = 1.0
+    # One line per completed HTTP request
+    REQUESTS: bool = True
+    model_config = SettingsConfigDict(env_prefix="LOG_")
+
+
+class ServerSettings(BaseSettings):
+    """Uvicorn options of `python -m app.main`"""
+
+    HOST: str = "localhost"
+    PORT: int = 8000
+    # Processes accepting connections. More than one requires
+    # CACHE_BACKEND=redis, otherwise cache invalidation and read-your-writes
+    # only reach the worker that handled the write
+    WORKERS: int = 1
+    # Development only, incompatible with more than one worker
+    RELOAD: bool = False
+    # auto picks uvloop and httptools when they are installed
+    LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    # Seconds keep-alive connections stay open between requests
+    KEEP_ALIVE: int = 5
+    model_config = SettingsConfigDict(env_prefix="SERVER_")
+
+
+class Settings:
+    """
+    All settings groups.
+
+    Every group reads and validates the environment on first access, so
+    importing the settings is cheap and a group that is never used, like the
+    mail one, never fails on missing variables.
+    """
+
+    @cached_property
+    def db(self) -> DatabaseSettings:
+        return DatabaseSettings()
+
+    @cached_property
+    def app(self) -> ApplicationSettings:
+        return ApplicationSettings()
+
+    @cached_property
+    def mail(self) -> MailSettings:
+        return MailSettings()
+
+    @cached_property
+    def llm(self) -> LLMSettings:
+        return LLMSettings()
+
+    @cached_property
+    def cache(self) -> CacheSettings:
+        return CacheSettings()
+
+    @cached_property
+    def log(self) -> LogSettings:
+        return LogSettings()
+
+    @cached_property
+    def server(self) -> ServerSettings:
+        return ServerSettings()
 
 
 settings = Settings()
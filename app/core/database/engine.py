@@ -1,44 +1,184 @@
-from typing import AsyncGenerator
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, List, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy import Engine, Select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.lib.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+from app.core.lib.client_id import get_client_id
 
-async_engine = create_async_engine(
-    settings.db.asyncpg_url.unicode_string(), echo=settings.db.ECHO_DEBUG_MODE
-)
-async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+from .pool import InstrumentedAsyncAdaptedQueuePool, register_pool_metrics
+from .statements import register_statement_metrics
 
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+def create_pooled_engine(url: str, name: str) -> AsyncEngine:
     """
-    Creates a new async session for the current context.
+    Creates an async engine with the pool configured from the database settings.
+
+    Args:
+        url (str): The asyncpg URL of the database.
+        name (str): The name of the pool in logs and metrics.
 
     Returns:
-        sqlalchemy.ext.asyncio.session.AsyncSession: The newly created async session.
+        AsyncEngine: The created engine.
+    """
+    engine = create_async_engine(
+        url,
+        echo=settings.db.ECHO_DEBUG_MODE,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=settings.db.POOL_SIZE,
+        max_overflow=settings.db.MAX_OVERFLOW,
+        pool_timeout=settings.db.POOL_TIMEOUT,
+        pool_recycle=settings.db.POOL_RECYCLE,
+        pool_pre_ping=settings.db.POOL_PRE_PING,
+        pool_logging_name=name,
+        connect_args={
+            "prepared_statement_cache_size": settings.db.STATEMENT_CACHE_SIZE
+        },
+    )
+    register_pool_metrics(engine, name)
+    register_statement_metrics(engine, name)
+    return engine
+
+
+async_engine = create_pooled_engine(settings.db.asyncpg_url.unicode_string(), "primary")
+replica_engines = [
+    create_pooled_engine(url, f"replica{number}")
+    for number, url in enumerate(settings.db.REPLICA_URLS, start=1)
+]
+
+
+def all_engines() -> List[AsyncEngine]:
+    return [async_engine, *replica_engines]
+
+
+def _reset_engines_after_fork() -> None:
+    # A worker forked from a preloaded app inherits the parent's pooled
+    # connections, whose sockets are shared with the parent. close=False drops
+    # them without sending a terminate message that would also end the
+    # parent's sessions; the child opens its own connections on first use.
+    # The recent writers are the parent's too: its own writes are what counts.
+    for engine in all_engines():
+        engine.sync_engine.dispose(close=False)
+    if isinstance(recent_writers, MemoryCacheBackend):
+        recent_writers.clear()
+
+
+os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections of every engine, on application shutdown."""
+    for engine in all_engines():
+        await engine.dispose()
+
+
+def create_recent_writers() -> CacheBackend:
+    """
+    Store of the clients that wrote recently, their reads are kept on the primary.
+
+    Shared between workers and instances with CACHE_BACKEND=redis, otherwise a
+    client whose read lands on another process than its write may not see it.
+    """
+    ttl = settings.db.READ_YOUR_WRITES_SECONDS
+    if settings.cache.BACKEND == "redis":
+        return RedisCacheBackend(settings.cache.REDIS_URL, ttl, prefix="writers:")
+    return MemoryCacheBackend(max_size=10_000, ttl=ttl)
+
+
+recent_writers = create_recent_writers()
+
+
+class RoutingSession(Session):
     """
+    Session sending plain SELECTs to a read replica and everything else to the primary.
+
+    The first statement that is not a plain SELECT (or any flush) pins the
+    session to the primary, so a unit of work reads its own writes. A session
+    sticks to one replica for all of its reads.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if (
+            replica_engines
+            and not self.info.get("primary")
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(replica_engines)
+            return self.info["replica"].sync_engine
+
+        if not isinstance(clause, Select):
+            self.info["primary"] = self.info["wrote"] = True
+        return async_engine.sync_engine
+
+
+async_session_maker = async_sessionmaker(
+    sync_session_class=RoutingSession, expire_on_commit=False
+)
+
+
+def pin_to_primary(session: AsyncSession) -> None:
+    """Routes all further statements of the session to the primary."""
+    session.sync_session.info["primary"] = True
+
+
+@asynccontextmanager
+async def routed_session(client: Optional[str]) -> AsyncIterator[AsyncSession]:
+    """
+    Opens a session routed by RoutingSession, honouring read-your-writes.
+
+    The session is pinned to the primary if the client wrote within the last
+    `DB_READ_YOUR_WRITES_SECONDS`, and a write through it marks the client as
+    a recent writer. Without replicas every statement goes to the primary and
+    the bookkeeping is skipped.
+
+    Args:
+        client (str, optional): The identifier of the client, see
+            ClientIdMiddleware. Anonymous clients are never pinned.
+    """
+    track = client is not None and bool(replica_engines)
     async with async_session_maker() as session:
+        if track and await recent_writers.get(client) is not None:
+            pin_to_primary(session)
+
         yield session
 
+        if track and session.sync_session.info.get("wrote"):
+            await recent_writers.set(client, b"1")
+
 
-def with_async_session(func):
+async def get_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Decorator for async session.
+    Creates a new async session for the current context.
+
+    Used as a request-scoped FastAPI dependency: every repository of the request
+    shares the session, so a request holds at most one pooled connection per
+    database. Anything not committed by the service layer is rolled back on close.
+
+    Reads are routed to a replica unless the client wrote recently, see
+    routed_session.
 
     Args:
-        func (function): The function to decorate.
+        request (Request): The current request.
 
     Returns:
-        function: The decorated function.
+        sqlalchemy.ext.asyncio.session.AsyncSession: The newly created async session.
     """
-
-    async def wrapper(*args, **kwargs):
-        if "session" in kwargs and kwargs["session"] is not None:
-            return await func(*args, **kwargs)
-        async for session in get_async_session():
-            return await func(*args, session=session, **kwargs)
-
-    return wrapper
+    async with routed_session(get_client_id(request)) as session:
+        yield session
 
 
 def load_models():
@@ -0,0 +1,193 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional, Set
+
+from prometheus_client import Counter, Gauge
+
+from app.core.lib.logger import main_logger
+
+SUBSCRIBERS = Gauge(
+    "db_notification_subscribers", "Subscribers of a LISTEN channel", ["channel"]
+)
+NOTIFICATIONS = Counter(
+    "db_notifications_total", "Notifications received on a LISTEN channel", ["channel"]
+)
+NOTIFICATIONS_DROPPED = Counter(
+    "db_notifications_dropped_total",
+    "Notifications dropped because a subscriber queue was full",
+    ["channel"],
+)
+
+
+class Subscription:
+    """
+    Bounded queue of the notifications delivered to one subscriber.
+
+    Args:
+        queue_size (int): The number of notifications kept for the subscriber.
+        select (Callable[[Any], Any], optional): Maps a notification to what
+            is queued, None to skip it. Defaults to queueing everything.
+    """
+
+    def __init__(
+        self, queue_size: int, select: Optional[Callable[[Any], Any]] = None
+    ) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.select = select
+        # Notifications lost to a full queue or while the listener reconnected
+        self.missed = 0
+
+    def pop_missed(self) -> int:
+        """Returns the number of notifications missed since the last call."""
+        missed, self.missed = self.missed, 0
+        return missed
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Waits for the next notification, returns None after `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationListener:
+    """
+    Fans out the JSON notifications of one Postgres channel to subscribers.
+
+    A single connection outside the pool runs LISTEN for the whole process and
+    every notification is copied into the queue of each matching subscriber,
+    so the number of subscribers does not add any database load. The
+    connection is opened with the first subscription and reopened with
+    exponential backoff when it is lost; subscribers are then told how many
+    notifications they may have missed.
+
+    Args:
+        dsn (str): The libpq URL of the primary, LISTEN does not work through
+            pgbouncer in transaction mode.
+        channel (str): The channel to listen on.
+        queue_size (int, optional): The queue size of every subscriber.
+            Defaults to 256.
+        keepalive (float, optional): Seconds between checks of the idle
+            connection. Defaults to 30.
+        connect_timeout (float, optional): Seconds to wait for a connection.
+            Defaults to 5.
+        max_reconnect_delay (float, optional): The upper bound of the backoff.
+            Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        queue_size: int = 256,
+        keepalive: float = 30,
+        connect_timeout: float = 5,
+        max_reconnect_delay: float = 30,
+    ) -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.max_reconnect_delay = max_reconnect_delay
+        self._subscriptions: Set[Subscription] = set()
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def subscribe(
+        self, select: Optional[Callable[[Any], Any]] = None
+    ) -> AsyncIterator[Subscription]:
+        """
+        Receives the notifications of the channel for the duration of the block.
+
+        Args:
+            select (Callable[[Any], Any], optional): Filter of the decoded
+                payloads, returns what to deliver or None to skip a payload.
+                Defaults to delivering everything.
+        """
+        if self._task is None or self._task.done():
+            self._connected = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if not self._connected.is_set():
+            try:
+                await asyncio.wait_for(self._connected.wait(), self.connect_timeout)
+            except asyncio.TimeoutError:
+                # Subscribed anyway, it is told about the gap once connected
+                pass
+
+        subscription = Subscription(self.queue_size, select)
+        self._subscriptions.add(subscription)
+        SUBSCRIBERS.labels(self.channel).set(len(self._subscriptions))
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+            SUBSCRIBERS.labels(self.channel).set(len(self._subscriptions))
+
+    async def stop(self) -> None:
+        """Closes the connection, subscribers stop receiving notifications."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            main_logger.warning(f"Invalid payload on channel {channel}: {payload!r}")
+            return
+
+        NOTIFICATIONS.labels(channel).inc()
+        for subscription in self._subscriptions:
+            selected = notification
+            if subscription.select is not None:
+                selected = subscription.select(notification)
+                if selected is None:
+                    continue
+            try:
+                subscription.queue.put_nowait(selected)
+            except asyncio.QueueFull:
+                subscription.missed += 1
+                NOTIFICATIONS_DROPPED.labels(channel).inc()
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        errors = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError)
+        delay = 1.0
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    self.dsn, timeout=self.connect_timeout
+                )
+            except errors as error:
+                main_logger.warning(
+                    f"LISTEN {self.channel} failed to connect, retrying in"
+                    f" {delay:.0f}s: {error}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            try:
+                await connection.add_listener(self.channel, self._dispatch)
+                delay = 1.0
+                # Whatever was sent while nobody listened is lost
+                for subscription in self._subscriptions:
+                    subscription.missed += 1
+                self._connected.set()
+                main_logger.info(f"Listening on channel {self.channel}")
+                while True:
+                    await asyncio.sleep(self.keepalive)
+                    await connection.fetchval("SELECT 1", timeout=self.connect_timeout)
+            except errors as error:
+                main_logger.warning(f"LISTEN {self.channel} connection lost: {error}")
+            finally:
+                self._connected.clear()
+                connection.terminate()
@@ -0,0 +1,72 @@
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+POOL_SIZE = Gauge("db_pool_size", "Configured size of the connection pool", ["pool"])
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["pool"]
+)
+POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in", "Idle connections currently kept in the pool", ["pool"]
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened above the pool size", ["pool"]
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+POOL_CONNECTION_HOLD = Histogram(
+    "db_pool_connection_hold_seconds",
+    "Time a connection stays checked out, usually the lifetime of a session",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 30, 120),
+)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long every checkout waits."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.logging_name).observe(
+                time.perf_counter() - started
+            )
+
+
+def register_pool_metrics(engine: AsyncEngine, name: str) -> None:
+    """
+    Exposes live gauges of the engine's pool and times connection checkouts.
+
+    The gauges read the pool on every scrape and the events are registered on
+    the engine, so both follow the engine across dispose() calls that replace
+    its pool.
+
+    Args:
+        engine (AsyncEngine): The engine whose pool is observed.
+        name (str): The value of the `pool` label.
+    """
+    POOL_SIZE.labels(name).set_function(lambda: engine.pool.size())
+    POOL_CHECKED_OUT.labels(name).set_function(lambda: engine.pool.checkedout())
+    POOL_CHECKED_IN.labels(name).set_function(lambda: engine.pool.checkedin())
+    POOL_OVERFLOW.labels(name).set_function(lambda: max(engine.pool.overflow(), 0))
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            POOL_CONNECTION_HOLD.labels(name).observe(
+                time.perf_counter() - checked_out_at
+            )
@@ -0,0 +1,107 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Type, TypeVar
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing SQL statements, per repository method",
+    ["pool", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+# The repository method whose statements are being executed
+current_operation: ContextVar[str] = ContextVar("current_operation", default="other")
+
+T = TypeVar("T")
+
+
+def _trace_coroutine(func: Callable, operation: str) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = current_operation.set(operation)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+def _trace_async_generator(func: Callable, operation: str) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        generator = func(*args, **kwargs)
+        try:
+            while True:
+                # Set only while the generator runs, not while the caller does
+                token = current_operation.set(operation)
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    current_operation.reset(token)
+                yield item
+        finally:
+            await generator.aclose()
+
+    return wrapper
+
+
+def traced_repository(cls: Type[T]) -> Type[T]:
+    """
+    Labels the statements of every public async method with the method name.
+
+    Class decorator for repositories: statements executed while a method
+    runs are recorded in `db_statement_duration_seconds` under the operation
+    "<Class>.<method>".
+
+    Args:
+        cls (Type[T]): The repository class.
+
+    Returns:
+        Type[T]: The same class with its methods wrapped.
+    """
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        operation = f"{cls.__name__}.{name}"
+        if inspect.iscoroutinefunction(func):
+            setattr(cls, name, _trace_coroutine(func, operation))
+        elif inspect.isasyncgenfunction(func):
+            setattr(cls, name, _trace_async_generator(func, operation))
+    return cls
+
+
+def register_statement_metrics(engine: AsyncEngine, name: str) -> None:
+    """
+    Times every statement executed by the engine.
+
+    Args:
+        engine (AsyncEngine): The engine whose statements are timed.
+        name (str): The value of the `pool` label.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["statement_started"].pop()
+        STATEMENT_DURATION.labels(name, current_operation.get()).observe(
+            time.perf_counter() - started
+        )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            stack = context.connection.info.get("statement_started")
+            if stack:
+                stack.pop()
@@ -0,0 +1,268 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from prometheus_client import REGISTRY, Metric
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.core.lib.logger import main_logger
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache with a time to live for every entry.
+
+    Not thread-safe: meant to be used from the event loop of one worker.
+
+    Args:
+        max_size (int): The maximum number of entries, the least recently used
+            entry is evicted first. Zero disables the cache.
+        ttl (float): The number of seconds an entry stays valid.
+        clock (Callable[[], float], optional): The time source. Defaults to
+            time.monotonic.
+    """
+
+    def __init__(
+        self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class CacheBackend(ABC):
+    """Async byte cache shared by the service layer."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached value, None on a miss."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        """Stores the value under the key."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Drops the key, missing keys are ignored."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]:
+        """Counters exported by CacheStatsCollector."""
+
+
+class NullCacheBackend(CacheBackend):
+    """Backend that never stores anything, for a disabled cache."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend keeping entries in a TTLCache of the current process."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._cache: TTLCache[str, bytes] = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        """Drops every entry, e.g. the copy inherited by a forked worker."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend storing entries in any server speaking the Redis protocol.
+
+    Requires the optional `redis` package. Server errors are logged and
+    treated as misses, so an unavailable cache never fails a request.
+
+    Args:
+        url (str): The server URL, e.g. redis://localhost:6379/0.
+        ttl (float): The number of seconds an entry stays valid.
+        prefix (str, optional): The prefix of all keys. Defaults to "cache:".
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "cache:") -> None:
+        try:
+            from redis import asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as exc:
+            raise RuntimeError("The redis cache backend requires `redis`") from exc
+
+        self._client = redis.from_url(url)
+        self._error = RedisError
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self._client.get(self.prefix + key)
+        except self._error as exc:
+            self._on_error(exc)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self._client.set(self.prefix + key, value, px=int(self.ttl * 1000))
+        except self._error as exc:
+            self._on_error(exc)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._client.delete(self.prefix + key)
+        except self._error as exc:
+            self._on_error(exc)
+
+    def _on_error(self, exc: Exception) -> None:
+        self.errors += 1
+        main_logger.warning(f"Cache server error: {exc}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheStatsCollector(Collector):
+    """Exports the stats() of registered caches as Prometheus metrics."""
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, Union[TTLCache, CacheBackend]] = {}
+
+    def add(self, name: str, cache: Union[TTLCache, CacheBackend]) -> None:
+        self._caches[name] = cache
+
+    def collect(self) -> Iterator[Metric]:
+        counters = {
+            "hits": "Cache lookups answered from the cache",
+            "misses": "Cache lookups that missed",
+            "evictions": "Cache entries evicted to make room",
+            "errors": "Failed cache server calls",
+        }
+        gauges = {
+            "size": "Entries held by the cache",
+            "hit_ratio": "Share of cache lookups answered from the cache",
+        }
+        stats = {name: cache.stats() for name, cache in self._caches.items()}
+
+        for stat, documentation in counters.items():
+            metric = CounterMetricFamily(
+                f"cache_{stat}", documentation, labels=["cache"]
+            )
+            for name, values in stats.items():
+                if stat in values:
+                    metric.add_metric([name], values[stat])
+            yield metric
+        for stat, documentation in gauges.items():
+            metric = GaugeMetricFamily(
+                f"cache_{stat}", documentation, labels=["cache"]
+            )
+            for name, values in stats.items():
+                if stat in values:
+                    metric.add_metric([name], values[stat])
+            yield metric
+
+
+cache_stats = CacheStatsCollector()
+REGISTRY.register(cache_stats)
@@ -0,0 +1,78 @@
+import re
+import uuid
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection, cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CLIENT_ID_HEADER = "X-Client-Id"
+CLIENT_ID_COOKIE = "client_id"
+# Opaque identifiers only, anything else is ignored as if it were missing
+CLIENT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{8,64}")
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_client_id(connection: HTTPConnection) -> Optional[str]:
+    """The client identifier assigned by ClientIdMiddleware, None if it has none."""
+    return connection.scope.get("state", {}).get("client_id")
+
+
+class ClientIdMiddleware:
+    """
+    Identifies the client sending a request, for state kept between requests.
+
+    The identifier comes from the X-Client-Id header, for API clients, or
+    else from the `client_id` cookie. A write without either gets a new
+    identifier, returned in the cookie of its response so the reads that
+    follow it are recognized. Reads never get a cookie, so their responses
+    stay cacheable. Network addresses are never used: every client behind a
+    proxy or a NAT would share one.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        max_age (int, optional): Lifetime of the cookie in seconds. Defaults
+            to a year.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int = 365 * 24 * 3600) -> None:
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        client_id = self._read_client_id(Headers(scope=scope))
+        issued = None
+        if client_id is None and scope.get("method", "GET") not in SAFE_METHODS:
+            client_id = issued = uuid.uuid4().hex
+        scope.setdefault("state", {})["client_id"] = client_id
+        if issued is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                cookie: SimpleCookie = SimpleCookie()
+                cookie[CLIENT_ID_COOKIE] = issued
+                cookie[CLIENT_ID_COOKIE]["max-age"] = self.max_age
+                cookie[CLIENT_ID_COOKIE]["path"] = "/"
+                cookie[CLIENT_ID_COOKIE]["httponly"] = True
+                cookie[CLIENT_ID_COOKIE]["samesite"] = "lax"
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie", cookie.output(header="").strip()
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _read_client_id(headers: Headers) -> Optional[str]:
+        cookies = cookie_parser(headers.get("cookie", ""))
+        for candidate in (headers.get(CLIENT_ID_HEADER), cookies.get(CLIENT_ID_COOKIE)):
+            if candidate and CLIENT_ID_PATTERN.fullmatch(candidate):
+                return candidate
+        return None
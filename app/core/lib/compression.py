@@ -0,0 +1,212 @@
+import zlib
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.lib.etag import add_etag_suffix, strip_etag_suffix
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip is used without it
+    brotli = None
+
+
+def parse_quality_values(header: str) -> Dict[str, float]:
+    """
+    Parses a header with quality values, such as Accept or Accept-Encoding.
+
+    Args:
+        header (str): The header value, e.g. "br;q=1.0, gzip;q=0.8, *;q=0".
+
+    Returns:
+        Dict[str, float]: The quality of every listed token, in lower case.
+    """
+    qualities = {}
+    for item in header.split(","):
+        token, *params = item.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token] = quality
+    return qualities
+
+
+class _Compressor:
+    """Incremental compressor of one response body."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            # 16 added to the window bits selects the gzip container
+            self._zlib = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, zlib.MAX_WBITS + 16
+            )
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk, flushing it to the client for streamed bodies."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        compressed = self._zlib.compress(data)
+        return compressed + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        """Return the end of the compressed stream."""
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, whichever the client prefers.
+
+    Brotli is offered only when the optional `brotli` package is installed.
+    Bodies sent in one message are compressed only from `minimum_size` bytes;
+    streamed bodies are compressed chunk by chunk and flushed after each one,
+    so NDJSON exports still arrive incrementally. Responses that already have
+    a Content-Encoding or an excluded media type are passed through.
+
+    Every response varies on Accept-Encoding. When an encoding is negotiated,
+    the ETag gets it as a suffix, also on bodies too small to compress and on
+    304 responses, so a tag always names the same bytes; the suffix is removed
+    from If-None-Match before the application compares it.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        minimum_size (int, optional): The smallest body worth compressing.
+            Defaults to 1024.
+        gzip_level (int, optional): The zlib compression level, 1-9.
+            Defaults to 6.
+        brotli_quality (int, optional): The brotli quality, 0-11. Defaults to 4.
+        excluded_media_types (Sequence[str], optional): Media types never
+            compressed. Defaults to server-sent events, which must not be
+            buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_media_types: Sequence[str] = ("text/event-stream",),
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = self._choose_encoding(accept_encoding)
+        if encoding is None:
+
+            async def send_identity(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                await send(message)
+
+            await self.app(scope, receive, send_identity)
+            return
+
+        strip_etag_suffix(scope, encoding)
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    @staticmethod
+    def _choose_encoding(accept_encoding: str) -> Optional[str]:
+        qualities = parse_quality_values(accept_encoding)
+        wildcard = qualities.get("*", 0.0)
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        best, best_quality = None, 0.0
+        for encoding in candidates:
+            quality = qualities.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+
+class _CompressionResponder:
+    """Rewrites the messages of one response, see CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            headers.add_vary_header("Accept-Encoding")
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            self._passthrough = (
+                "content-encoding" in headers
+                or media_type in self.middleware.excluded_media_types
+            )
+            if not self._passthrough and "etag" in headers:
+                headers["ETag"] = add_etag_suffix(headers["etag"], self.encoding)
+            if self._passthrough:
+                await self._send(message)
+            else:
+                # Delayed until the first body message shows the body size
+                self._start = message
+            return
+
+        if self._passthrough or message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._compressor = _Compressor(
+                self.encoding,
+                self.middleware.gzip_level,
+                self.middleware.brotli_quality,
+            )
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self._compressor.compress(body) + self._compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(start)
+
+        if more_body:
+            body = self._compressor.compress(body, flush=True)
+        else:
+            body = self._compressor.compress(body) + self._compressor.finish()
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
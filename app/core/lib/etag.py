@@ -0,0 +1,87 @@
+import hashlib
+from typing import Any, Optional
+
+from starlette.responses import Response
+from starlette.types import Scope
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Builds a strong entity tag from the parts identifying a representation.
+
+    Args:
+        *parts (Any): Values that change whenever the representation changes,
+            such as a modification time and a row count.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    raw = "\x1f".join(str(part) for part in parts)
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the current entity tag.
+
+    Uses the weak comparison required for If-None-Match, so a `W/` prefix
+    added by a proxy still matches.
+
+    Args:
+        if_none_match (Optional[str]): The header value, if any.
+        etag (str): The current entity tag.
+
+    Returns:
+        bool: Whether the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Builds an empty 304 response carrying the entity tag."""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def add_etag_suffix(etag: str, suffix: str) -> str:
+    """
+    Tags a transformed representation, such as a compressed one.
+
+    Strong entity tags must differ between bodies that differ, so middlewares
+    re-encoding a body append a suffix naming the encoding.
+
+    Args:
+        etag (str): The quoted entity tag, possibly weak.
+        suffix (str): The name of the transformation, e.g. "gzip".
+
+    Returns:
+        str: The tag with the suffix inside the quotes, e.g. '"abc-gzip"'.
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{suffix}"'
+
+
+def strip_etag_suffix(scope: Scope, suffix: str) -> None:
+    """
+    Removes a suffix added by `add_etag_suffix` from the request's If-None-Match.
+
+    Lets the application compare the tags sent back by the client with its
+    own. The scope is changed in place, so outer middlewares see the routing
+    information the application adds to it.
+
+    Args:
+        scope (Scope): The scope of the HTTP request.
+        suffix (str): The suffix to remove from every tag.
+    """
+    marker = f'-{suffix}"'.encode("latin-1")
+    scope["headers"] = [
+        (name, value.replace(marker, b'"') if name == b"if-none-match" else value)
+        for name, value in scope["headers"]
+    ]
@@ -1,16 +1,27 @@
+import logging
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Never, Optional
+from typing import AsyncIterator, Awaitable, Callable, Never, Optional, Sequence
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
-from app.core.lib.logger import main_logger
+from app.core.lib.client_id import ClientIdMiddleware
+from app.core.lib.compression import CompressionMiddleware
+from app.core.lib.logger import (
+    RequestLoggingMiddleware,
+    configure_logging,
+    main_logger,
+)
+from app.core.lib.negotiation import MessagePackMiddleware
 from app.core.lib.prometheus import setup_monitoring
 
 
 def create_default_fastapi_app(
-    title: str, prometheus_setup: Optional[bool] = False, **kwargs: FastAPI
+    title: str,
+    prometheus_setup: Optional[bool] = False,
+    on_shutdown: Sequence[Callable[[], Awaitable[None]]] = (),
+    **kwargs: FastAPI,
 ) -> FastAPI:
     """
     Create and configure a default FastAPI application with CORS middleware and optional Prometheus monitoring.
@@ -21,6 +32,8 @@ def create_default_fastapi_app(
     Args:
         title (str): The title of the FastAPI application.
         prometheus_setup (bool, optional): Whether to set up Prometheus monitoring. Defaults to True.
+        on_shutdown (Sequence[Callable[[], Awaitable[None]]], optional): Coroutine functions
+            awaited on shutdown, before the database engines are disposed. Defaults to ().
         **kwargs: Additional keyword arguments to pass to the FastAPI constructor.
 
     Returns:
@@ -39,10 +52,44 @@ def create_default_fastapi_app(
             f"{title} fastapi app is successfully connected to database {settings.db.NAME}"
         )
         yield
+        for callback in on_shutdown:
+            await callback()
+
+        from app.core.database.engine import dispose_engines
+
+        await dispose_engines()
         main_logger.info(f"Shutdown {title} fastapi app complete")
 
     app = FastAPI(title=title, lifespan=lifespan, **kwargs)
 
+    from app.core.config import settings
+
+    configure_logging(
+        level=settings.log.LEVEL,
+        json_output=settings.log.JSON,
+        queued=settings.log.QUEUED,
+        queue_size=settings.log.QUEUE_SIZE,
+        sample_rates={
+            logging.DEBUG: settings.log.SAMPLE_DEBUG,
+            logging.INFO: settings.log.SAMPLE_INFO,
+        },
+    )
+
+    # Added first so that it runs inside compression: MessagePack gets compressed
+    if settings.app.MSGPACK:
+        app.add_middleware(MessagePackMiddleware)
+    if settings.app.COMPRESSION:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.app.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.app.GZIP_LEVEL,
+            brotli_quality=settings.app.BROTLI_QUALITY,
+        )
+
+    # Read-your-writes needs to recognize the client across requests
+    if settings.db.REPLICA_URLS:
+        app.add_middleware(ClientIdMiddleware)
+
     origins = ["*"]
     app.add_middleware(
         CORSMiddleware,
@@ -51,6 +98,9 @@ def create_default_fastapi_app(
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Wraps the middlewares above, so the logged latency includes them
+    if settings.log.REQUESTS:
+        app.add_middleware(RequestLoggingMiddleware)
 
     if prometheus_setup:
         setup_monitoring(app)
@@ -1,4 +1,19 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Mapping, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 main_logger = logging.getLogger(__name__)
 main_logger.setLevel(logging.DEBUG)
@@ -11,3 +26,219 @@ console_handler.setFormatter(formatter)
 
 if not main_logger.handlers:
     main_logger.addHandler(console_handler)
+
+# ASGI scope of the request being handled, its fields tag every record
+request_scope: ContextVar[Optional[Scope]] = ContextVar("request_scope", default=None)
+
+REQUEST_FIELDS = ("request_id", "method", "route", "status", "latency_ms")
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the ID, method and route of the current request to the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = request_scope.get()
+        if scope is not None:
+            # The route is known only once the router has matched the request
+            route = scope.get("route")
+            record.request_id = scope["state"].get("request_id")
+            record.method = scope["method"]
+            record.route = getattr(route, "path", scope["path"])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a random share of the records of every level.
+
+    Args:
+        rates (Mapping[int, float]): The share kept per level, e.g.
+            {logging.DEBUG: 0.01}. Levels not listed are always kept.
+    """
+
+    def __init__(self, rates: Mapping[int, float]) -> None:
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in REQUEST_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, keeps the message and the traceback
+        # apart, so the formatter of the listener sees both
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Queue handler and listener of the last queued configure_logging call
+_queued: Optional[Tuple[DroppingQueueHandler, QueueListener]] = None
+
+
+def _restart_listener_after_fork() -> None:
+    # Threads are not copied into a forked child, without a new listener its
+    # records would fill a queue nobody reads and then be dropped. The copied
+    # queue holds records the parent writes itself and its lock may have been
+    # held by the parent's listener, so the child starts with an empty one.
+    if _queued is None:
+        return
+    handler, listener = _queued
+    handler.queue = listener.queue = queue.Queue(handler.queue.maxsize)
+    listener._thread = None
+    listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def configure_logging(
+    level: str = "DEBUG",
+    json_output: bool = False,
+    queued: bool = True,
+    queue_size: int = 10_000,
+    sample_rates: Optional[Mapping[int, float]] = None,
+) -> Optional[QueueListener]:
+    """
+    Reconfigures `main_logger`.
+
+    In queued mode the calling code only puts records on a bounded queue and a
+    background thread writes them, so a slow stdout never stalls the event
+    loop; records are dropped while the queue is full. A worker forked after
+    this call gets its own listener thread. Sampling and request
+    fields are applied before queueing, in the thread that logs.
+
+    Takes plain values rather than reading the settings, so that this module
+    stays importable from the settings and everything below them.
+
+    Args:
+        level (str, optional): The minimum level. Defaults to "DEBUG".
+        json_output (bool, optional): Whether to write JSON lines. Defaults to
+            False.
+        queued (bool, optional): Whether to write from a background thread.
+            Defaults to True.
+        queue_size (int, optional): The number of records the queue holds.
+            Defaults to 10_000.
+        sample_rates (Optional[Mapping[int, float]], optional): The share of
+            records kept per level. Defaults to keeping everything.
+
+    Returns:
+        Optional[QueueListener]: The started listener in queued mode, it is
+        stopped at interpreter exit.
+    """
+    stream_handler = logging.StreamHandler()
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(formatter)
+
+    global _queued
+    listener = None
+    if queued:
+        queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+        listener = QueueListener(queue_handler.queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        handler: logging.Handler = queue_handler
+        _queued = (queue_handler, listener)
+    else:
+        handler = stream_handler
+        _queued = None
+
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    handler.addFilter(RequestContextFilter())
+
+    for old_handler in list(main_logger.handlers):
+        main_logger.removeHandler(old_handler)
+    main_logger.addHandler(handler)
+    main_logger.setLevel(level)
+    main_logger.propagate = False
+    return listener
+
+
+class RequestLoggingMiddleware:
+    """
+    Tags the logs of every request and logs one line when it completes.
+
+    The request ID is taken from the X-Request-ID header or generated, stored
+    in `request.state.request_id` and sent back in the same header.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        logger (logging.Logger, optional): The logger of the completion
+            lines. Defaults to main_logger.
+    """
+
+    def __init__(self, app: ASGIApp, logger: logging.Logger = main_logger) -> None:
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_scope.set(scope)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.logger.info(
+                "request completed",
+                extra={
+                    "status": status,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            request_scope.reset(token)
@@ -0,0 +1,103 @@
+import json
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.lib.compression import parse_quality_values
+from app.core.lib.etag import add_etag_suffix, strip_etag_suffix
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, JSON is always served without it
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class MessagePackMiddleware:
+    """
+    Serves JSON responses as MessagePack to clients preferring it in Accept.
+
+    The JSON body is transcoded once it is complete, so only responses sent
+    as `application/json` are affected; streams, errors in other formats and
+    clients that do not ask for MessagePack get the response unchanged. Does
+    nothing unless the optional `msgpack` package is installed.
+
+    Every response varies on Accept. For clients getting MessagePack the ETag
+    of JSON and 304 responses ends in "-msgpack", which is removed from
+    If-None-Match before the application compares it.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or msgpack is None:
+            await self.app(scope, receive, send)
+            return
+
+        media_type = self._choose_media_type(Headers(scope=scope).get("accept", ""))
+        if media_type is None:
+
+            async def send_json(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).add_vary_header("Accept")
+                await send(message)
+
+            await self.app(scope, receive, send_json)
+            return
+
+        strip_etag_suffix(scope, "msgpack")
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        transcode = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, transcode
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.add_vary_header("Accept")
+                content_type = headers.get("content-type", "")
+                transcode = content_type.split(";")[0].strip() == "application/json"
+                # A 304 confirms the MessagePack body the client already has
+                if "etag" in headers and (transcode or message["status"] == 304):
+                    headers["ETag"] = add_etag_suffix(headers["etag"], "msgpack")
+                if transcode:
+                    start = message
+                else:
+                    await send(message)
+                return
+            if not transcode or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if body:
+                body = msgpack.packb(json.loads(body))
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Type"] = media_type
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _choose_media_type(accept: str) -> Optional[str]:
+        """Pick a MessagePack media type if the client prefers it over JSON."""
+        qualities = parse_quality_values(accept)
+        json_quality = qualities.get("application/json", 0.0)
+        for media_type in MSGPACK_MEDIA_TYPES:
+            quality = qualities.get(media_type, 0.0)
+            if quality > 0 and quality >= json_quality:
+                return media_type
+        return None
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
-from prometheus_fastapi_instrumentator import Instrumentator
 
 
 def setup_monitoring(app: FastAPI) -> None:
+    # Imported here so that applications without metrics do not pay for it
+    from prometheus_fastapi_instrumentator import Instrumentator
+
     Instrumentator().instrument(app).expose(app)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+class QueueFullError(Exception):
+    """Raised when a limiter cannot queue one more waiter."""
+
+
+class ConcurrencyLimiter:
+    """
+    Limits concurrent use of a resource with a bounded FIFO wait queue.
+
+    Waiters are served strictly in arrival order, so callers that hold at most
+    one pending request each (like a websocket handler) get their turns fairly.
+
+    Args:
+        concurrency (int): The number of callers allowed to run at once.
+        queue_size (int): The number of callers allowed to wait for a slot,
+            further callers are rejected with QueueFullError.
+        active (Gauge, optional): Gauge tracking the number of running callers.
+        queue_depth (Gauge, optional): Gauge tracking the number of waiters.
+        wait_time (Histogram, optional): Histogram of the time spent waiting.
+        rejected (Counter, optional): Counter of rejected callers.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        queue_size: int,
+        active: Optional[Gauge] = None,
+        queue_depth: Optional[Gauge] = None,
+        wait_time: Optional[Histogram] = None,
+        rejected: Optional[Counter] = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._active_gauge = active
+        self._queue_depth = queue_depth
+        self._wait_time = wait_time
+        self._rejected = rejected
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(
+        self, on_queued: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> AsyncIterator[None]:
+        """
+        Holds a slot for the duration of the block.
+
+        Args:
+            on_queued (Callable[[int], Awaitable[None]], optional): Awaited with
+                the 1-based queue position when the caller has to wait.
+
+        Raises:
+            QueueFullError: If all slots are taken and the queue is full.
+        """
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+        else:
+            await self._wait(on_queued)
+        self._update_gauges()
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, on_queued: Optional[Callable[[int], Awaitable[None]]]) -> None:
+        if len(self._waiters) >= self.queue_size:
+            if self._rejected is not None:
+                self._rejected.inc()
+            raise QueueFullError(f"{len(self._waiters)} callers are already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._update_gauges()
+        started = time.monotonic()
+        try:
+            if on_queued is not None:
+                await on_queued(len(self._waiters))
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # The slot was handed over right before we gave up on it
+                self._release()
+            else:
+                future.cancel()
+                self._waiters.remove(future)
+                self._update_gauges()
+            raise
+
+        if self._wait_time is not None:
+            self._wait_time.observe(time.monotonic() - started)
+
+    def _release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                # Hand the slot over to the next waiter, the count stays as is
+                future.set_result(None)
+                self._update_gauges()
+                return
+        self._active -= 1
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        if self._active_gauge is not None:
+            self._active_gauge.set(self._active)
+        if self._queue_depth is not None:
+            self._queue_depth.set(len(self._waiters))
@@ -0,0 +1,34 @@
+from typing import Any, Mapping, Optional
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+
+def json_response(
+    adapter: TypeAdapter,
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Builds a JSON response in a single pydantic-core pass.
+
+    FastAPI validates a `response_model` result, converts it to Python
+    primitives and then encodes them with the stdlib `json`. Here the content,
+    ORM objects included, is validated from attributes and dumped straight to
+    bytes, which produces the same body for a fraction of the CPU time.
+
+    Args:
+        adapter (TypeAdapter): The adapter of the response model.
+        content (Any): The value returned by the route.
+        status_code (int, optional): The response status. Defaults to 200.
+        headers (Optional[Mapping[str, str]], optional): Extra headers.
+            Defaults to None.
+
+    Returns:
+        Response: The rendered response.
+    """
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return Response(
+        body, status_code=status_code, headers=headers, media_type="application/json"
+    )
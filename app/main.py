@@ -1,15 +1,41 @@
-import uvicorn
-from dotenv import load_dotenv
 from fastapi import FastAPI
 
 from app.core.config import settings
 from app.core.lib import create_default_fastapi_app
 from app.core.router import api_router
+from app.tickets.changes import ticket_changes
 
-load_dotenv()
-app: FastAPI = create_default_fastapi_app(title="Ticket System API")
+app: FastAPI = create_default_fastapi_app(
+    title="Ticket System API",
+    prometheus_setup=settings.app.METRICS,
+    on_shutdown=[ticket_changes.stop],
+)
 
 app.include_router(api_router)
 
+
+
+def check_server_settings() -> None:
+    """Refuses worker counts the configured backends cannot keep consistent."""
+    if settings.server.WORKERS > 1 and settings.cache.BACKEND != "redis":
+        raise SystemExit(
+            f"SERVER_WORKERS={settings.server.WORKERS} requires CACHE_BACKEND=redis:"
+            " the in-memory cache and read-your-writes state are per process"
+        )
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", port=8000, host="localhost", reload=True)
+    import uvicorn
+
+    check_server_settings()
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server.HOST,
+        port=settings.server.PORT,
+        workers=settings.server.WORKERS,
+        reload=settings.server.RELOAD,
+        loop=settings.server.LOOP,
+        http=settings.server.HTTP,
+        timeout_keep_alive=settings.server.KEEP_ALIVE,
+    )
@@ -1,23 +1,313 @@
-from openai import OpenAI
-
-client = OpenAI(base_url="http://31.128.49.187:11434/v1", api_key="ollama")
-
-def create_openai_instance(system_prompt: str):
-    chat_history = []
-    def chat_with_openai(user_message: str):
-        messages = [{"role": "system", "content": system_prompt}] + chat_history
-        messages.append({"role": "user", "content": user_message})
-        
-        response = client.beta.chat.completions.parse(
-            model="llama3.2",
-            messages=messages,
-            temperature=0.3
+import asyncio
+import hashlib
+import re
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.lib import main_logger
+from app.core.lib.cache import TTLCache, cache_stats
+from app.core.lib.scheduler import ConcurrencyLimiter, QueueFullError
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types import CompletionUsage
+
+_client: Optional["AsyncOpenAI"] = None
+
+
+def get_client() -> "AsyncOpenAI":
+    """
+    Returns the client of the LLM endpoint, created on first use.
+
+    `openai` takes a good part of the application import time, so it is only
+    imported once the assistant is actually used.
+    """
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+
+        _client = AsyncOpenAI(
+            base_url=settings.llm.BASE_URL, api_key=settings.llm.API_KEY
         )
-        
-        reply = response.choices[0].message.content
-        chat_history.append({"role": "user", "content": user_message})
-        chat_history.append({"role": "assistant", "content": reply})
-        
-        return reply
-    
-    return chat_with_openai
+    return _client
+
+# Every model call goes through the limiter so a burst of chats queues here,
+# in front of the single Ollama backend
+llm_limiter = ConcurrencyLimiter(
+    concurrency=settings.llm.MAX_CONCURRENCY,
+    queue_size=settings.llm.MAX_QUEUE,
+    active=Gauge("llm_active_generations", "LLM generations in progress"),
+    queue_depth=Gauge("llm_queue_depth", "Chat messages waiting for an LLM slot"),
+    wait_time=Histogram(
+        "llm_queue_wait_seconds",
+        "Time chat messages wait for an LLM slot",
+        buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+    ),
+    rejected=Counter("llm_rejected", "Chat messages rejected with a full LLM queue"),
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Duration of LLM calls from request to last token, without queueing",
+    ["call", "outcome"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from an assistant request to its first streamed token",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens processed by the LLM, estimated when the server reports no usage",
+    ["call", "kind"],
+)
+
+# Answers to the first question of a chat, keyed on the system prompt digest
+# and the normalised question. Later turns depend on the history, so they are
+# never cached.
+answer_cache: TTLCache[Tuple[str, str], str] = TTLCache(
+    max_size=settings.llm.CACHE_SIZE, ttl=settings.llm.CACHE_TTL_SECONDS
+)
+cache_stats.add("llm_answers", answer_cache)
+
+# llama tokenizers average about three characters per token on Russian text
+CHARS_PER_TOKEN = 3
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "Кратко перескажи диалог пользователя с ассистентом техподдержки. "
+    "Сохрани суть вопросов, важные факты о пользователе и данные ответы."
+)
+SUMMARY_PREFIX = "Краткое содержание предыдущей части диалога: "
+# Trimming goes below the budget, so the next turns fit without compacting
+TRIM_TARGET = 0.75
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, punctuation and whitespace differences of a question."""
+    text = text.lower().replace("ё", "е")
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for a single chat message."""
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def record_tokens(
+    call: str,
+    usage: Optional["CompletionUsage"],
+    messages: List[Dict[str, str]],
+    reply: str,
+) -> None:
+    """Count the tokens of an LLM call, estimating them if usage is missing."""
+    if usage is not None:
+        prompt, completion = usage.prompt_tokens, usage.completion_tokens
+    else:
+        prompt = sum(estimate_tokens(message["content"]) for message in messages)
+        completion = estimate_tokens(reply)
+    LLM_TOKENS.labels(call, "prompt").inc(prompt)
+    LLM_TOKENS.labels(call, "completion").inc(completion)
+
+
+class ChatHistory:
+    """
+    Chat context of one connection, kept under a token budget.
+
+    The budget covers the summary and the turns only: the system prompt is
+    sent with every message whatever the history, so counting it would just
+    shrink the room left for the conversation.
+    """
+
+    def __init__(self, system_prompt: str, token_budget: int) -> None:
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.summary: Optional[str] = None
+        self.turns: List[Dict[str, str]] = []
+
+    def messages(self, user_message: str) -> List[Dict[str, str]]:
+        """Messages to send to the model for the next user message."""
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+        return messages + self.turns + [{"role": "user", "content": user_message}]
+
+    def append(self, user_message: str, reply: str) -> None:
+        self.turns.append({"role": "user", "content": user_message})
+        self.turns.append({"role": "assistant", "content": reply})
+
+    def trim(self) -> List[Dict[str, str]]:
+        """Drop the oldest turns to below the budget, keeping the last exchange."""
+        target = self.token_budget * TRIM_TARGET
+        dropped = []
+        while self.token_count > target and len(self.turns) > 2:
+            dropped.extend(self.turns[:2])
+            del self.turns[:2]
+        return dropped
+
+    @property
+    def token_count(self) -> int:
+        """Estimated tokens of the summary and the turns."""
+        texts = [self.summary or ""]
+        texts.extend(turn["content"] for turn in self.turns)
+        return sum(estimate_tokens(text) for text in texts)
+
+    @property
+    def memory_bytes(self) -> int:
+        texts = [self.summary or ""]
+        texts.extend(turn["content"] for turn in self.turns)
+        return sum(len(text.encode()) for text in texts)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns": len(self.turns) // 2,
+            "tokens": self.token_count,
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+class ChatSession:
+    """
+    Assistant chat of one connection.
+
+    Calling the session with a user message streams the reply token by token.
+    Once the history outgrows its budget, old turns are trimmed (and
+    summarised if enabled) in the background between two messages, so the
+    compaction never delays a reply.
+    """
+
+    def __init__(self, system_prompt: str) -> None:
+        self.history = ChatHistory(system_prompt, settings.llm.HISTORY_TOKEN_BUDGET)
+        self._prompt_digest = hashlib.sha1(system_prompt.encode()).hexdigest()
+        self._compaction: Optional[asyncio.Task] = None
+
+    async def __call__(
+        self,
+        user_message: str,
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the reply to a user message.
+
+        Args:
+            user_message (str): The message of the user.
+            on_queued (Callable[[int], Awaitable[None]], optional): Awaited with
+                the queue position when the model is busy.
+
+        Raises:
+            QueueFullError: If the model is busy and the wait queue is full.
+        """
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+
+        cache_key = None
+        if not self.history.turns and not self.history.summary:
+            cache_key = (self._prompt_digest, normalize_question(user_message))
+            reply = answer_cache.get(cache_key)
+            if reply is not None:
+                self.history.append(user_message, reply)
+                yield reply
+                return
+
+        parts = []
+        usage = None
+        messages = self.history.messages(user_message)
+        async with llm_limiter.slot(on_queued):
+            started = time.perf_counter()
+            # Stays "cancelled" if the client leaves before the last token
+            outcome = "cancelled"
+            try:
+                stream = await get_client().chat.completions.create(
+                    model=settings.llm.MODEL,
+                    messages=messages,
+                    temperature=settings.llm.TEMPERATURE,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    # The usage arrives in a last chunk without choices
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        if not parts:
+                            first_token_after = time.perf_counter() - started
+                            LLM_TIME_TO_FIRST_TOKEN.observe(first_token_after)
+                        parts.append(token)
+                        yield token
+                outcome = "ok"
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                LLM_REQUEST_DURATION.labels("chat", outcome).observe(
+                    time.perf_counter() - started
+                )
+
+        # Only completed turns make it into the history
+        reply = "".join(parts)
+        record_tokens("chat", usage, messages, reply)
+        self.history.append(user_message, reply)
+        if cache_key is not None and reply:
+            answer_cache.set(cache_key, reply)
+        if self.history.token_count > self.history.token_budget:
+            self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self) -> None:
+        from openai import OpenAIError
+
+        dropped = self.history.trim()
+        if not dropped or not settings.llm.HISTORY_SUMMARY:
+            return
+
+        dialog = "\n".join(f"{turn['role']}: {turn['content']}" for turn in dropped)
+        if self.history.summary:
+            dialog = f"{SUMMARY_PREFIX}{self.history.summary}\n{dialog}"
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": dialog},
+        ]
+        try:
+            async with llm_limiter.slot():
+                started = time.perf_counter()
+                outcome = "cancelled"
+                try:
+                    response = await get_client().chat.completions.create(
+                        model=settings.llm.MODEL,
+                        messages=messages,
+                        temperature=0,
+                        max_tokens=settings.llm.SUMMARY_MAX_TOKENS,
+                    )
+                    outcome = "ok"
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    LLM_REQUEST_DURATION.labels("summary", outcome).observe(
+                        time.perf_counter() - started
+                    )
+        except (OpenAIError, QueueFullError) as exc:
+            main_logger.warning(f"Chat history summary failed, turns dropped: {exc}")
+            return
+        self.history.summary = response.choices[0].message.content
+        record_tokens("summary", response.usage, messages, self.history.summary or "")
+
+
+def create_openai_instance(system_prompt: str) -> ChatSession:
+    return ChatSession(system_prompt)
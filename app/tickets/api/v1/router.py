@@ -1,23 +1,78 @@
-from typing import Annotated, List, Sequence
+from typing import Annotated, Any, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, Form, Header, Query, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    Form,
+    Header,
+    Query,
+    HTTPException,
+    Request,
+    Response,
+)
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 
+from app.core.config import settings
+from app.core.database.engine import routed_session
+from app.core.lib.client_id import get_client_id
+from app.core.lib.etag import etag_matches, not_modified
+from app.core.lib.serialization import json_response
+from app.tickets.changes import change_events
+from app.tickets.dependencies import TicketsServiceDep
+from app.tickets.exceptions import InvalidCursorException, PayloadTooLargeException
 from app.tickets.models import Ticket, Comment
 from app.tickets.schemas import (
     Ticket as TicketSchema,
     TicketCreate,
     TicketUpdate,
     Comment as CommentSchema,
-    CommentCreate, TicketBase
+    CommentCreate, TicketBase,
+    ExportFormat,
+    SortOrder,
+    TicketBulkCreate,
+    TicketBulkCreated,
+    TicketFilter,
+    TicketPage,
+    TicketSearchPage,
+    TicketSummaryPage,
 )
 from app.tickets.services import TicketsService
+from app.utils.pagination import Page, decode_cursor
 
+from ....core.lib.scheduler import QueueFullError
 from ....ollama import create_openai_instance
 
 tickets_router = APIRouter(tags=["tickets"], prefix="/tickets")
 
+ticket_adapter = TypeAdapter(TicketSchema)
+ticket_page_adapter = TypeAdapter(TicketPage)
+ticket_summary_page_adapter = TypeAdapter(TicketSummaryPage)
+ticket_search_page_adapter = TypeAdapter(TicketSearchPage)
+comment_adapter = TypeAdapter(CommentSchema)
+comments_adapter = TypeAdapter(List[CommentSchema])
+
+
+def render(
+    adapter: TypeAdapter,
+    content: Any,
+    status_code: int = 200,
+    response: Optional[Response] = None,
+) -> Any:
+    """
+    Render the result of a route with the fast path if FAST_SERIALIZATION is on.
+
+    Otherwise the content is returned as is and FastAPI serializes it through
+    the `response_model` of the route, which must match the adapter.
+    """
+    if not settings.app.FAST_SERIALIZATION:
+        return content
+    headers = response.headers if response is not None else None
+    return json_response(adapter, content, status_code, headers)
+
 system_prompt = '''### 🔹 Промт:  
 
 Ты — виртуальный ассистент техподдержки маркетплейса для товаров ручной работы.  
@@ -68,68 +123,309 @@ system_prompt = '''### 🔹 Промт:
 
 ---'''
 
-@tickets_router.get("/", response_model=List[TicketSchema])
-async def get_tickets() -> Sequence[Ticket]:
-    """Get all tickets."""
-    return await TicketsService().get_all()
+@tickets_router.get("/", response_model=TicketPage)
+async def get_tickets(
+    service: TicketsServiceDep,
+    filters: Annotated[TicketFilter, Depends()],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+) -> Page[Ticket]:
+    """Get a page of tickets, pass `next_cursor` back as `cursor` for the next one."""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise InvalidCursorException()
+    return render(
+        ticket_page_adapter, await service.get_page(filters, limit, after, order)
+    )
 
 
-@tickets_router.get("/{ticket_id}", response_model=TicketSchema)
-async def get_ticket(ticket_id: int) -> Ticket:
-    """Get ticket by ID."""
+@tickets_router.get("/summary", response_model=TicketSummaryPage)
+async def get_tickets_summary(
+    service: TicketsServiceDep,
+    filters: Annotated[TicketFilter, Depends()],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.DESC,
+) -> Page:
+    """Get a page of tickets with comment counts instead of embedded comments."""
     try:
-        return await TicketsService().get_by_id(ticket_id)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise InvalidCursorException()
+    return render(
+        ticket_summary_page_adapter,
+        await service.get_summary_page(filters, limit, after, order),
+    )
+
+
+@tickets_router.get("/search", response_model=TicketSearchPage)
+async def search_tickets(
+    service: TicketsServiceDep,
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0, le=1000)] = 0,
+) -> Page:
+    """
+    Full-text search over ticket titles, descriptions and comments.
+
+    `q` uses web search syntax: quoted phrases, `or` and `-word` exclusions.
+    Matched words in `headline` are wrapped in `<b>` tags.
+    """
+    return render(ticket_search_page_adapter, await service.search(q, limit, offset))
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+@tickets_router.get("/export", response_class=StreamingResponse)
+async def export_tickets(
+    request: Request,
+    filters: Annotated[TicketFilter, Depends()],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.NDJSON,
+) -> StreamingResponse:
+    """Stream all tickets matching the list filters as NDJSON or CSV."""
+    client = get_client_id(request)
+
+    async def chunks():
+        # The response outlives request dependencies, so the stream owns its session
+        async with routed_session(client) as session:
+            async for chunk in TicketsService(session).export(filters, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="tickets.{export_format}"'
+        },
+    )
+
+
+@tickets_router.get("/changes", response_class=StreamingResponse)
+async def stream_changes(
+    ticket_id: Annotated[List[int], Query()] = [],
+    status: Annotated[List[str], Query()] = [],
+) -> StreamingResponse:
+    """
+    Stream ticket and comment changes as server-sent events.
+
+    Events are named `ticket` or `comment` and carry the `action` of one
+    statement and its `changes`, one per ticket with `ticket_id`, `status` and
+    `previous_status`; fetch the changed tickets to get their content. Repeat
+    `ticket_id` or `status` to follow several. A
+    `reset` event means changes were missed and everything shown should be
+    reloaded.
+    """
+    return StreamingResponse(
+        change_events(ticket_id, status),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+NOT_MODIFIED_RESPONSES = {304: {"description": "Not modified"}}
+
+
+@tickets_router.get(
+    "/{ticket_id}", response_model=TicketSchema, responses=NOT_MODIFIED_RESPONSES
+)
+async def get_ticket(
+    ticket_id: int,
+    service: TicketsServiceDep,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> TicketSchema:
+    """Get ticket by ID, or 304 if `If-None-Match` holds its current ETag."""
+    try:
+        # Only conditional requests pay for the version query
+        if if_none_match:
+            etag = await service.get_ticket_etag(ticket_id)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        ticket = await service.get_cached(ticket_id)
     except ValueError:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    # Derived from the body itself, so the tag never outlives stale data
+    response.headers["ETag"] = service.ticket_etag(ticket)
+    return render(ticket_adapter, ticket, response=response)
 
 
 @tickets_router.post("/", status_code=201)
-async def create_ticket(ticket: TicketCreate):
+async def create_ticket(ticket: TicketCreate, service: TicketsServiceDep):
     """Create new ticket."""
-    return await TicketsService().create(ticket)
+    return await service.create(ticket)
+
+
+bulk_tickets_adapter = TypeAdapter(List[TicketBulkCreate])
+
+
+async def read_limited_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body, 413 as soon as it grows past `max_bytes`."""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise PayloadTooLargeException(max_bytes)
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise PayloadTooLargeException(max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def too_many_rows(max_rows: int) -> RequestValidationError:
+    return RequestValidationError(
+        [
+            {
+                "type": "too_long",
+                "loc": ("body",),
+                "msg": f"At most {max_rows} tickets can be created at once",
+                "input": None,
+                "ctx": {"max_length": max_rows},
+            }
+        ]
+    )
+
+
+@tickets_router.post("/bulk", response_model=TicketBulkCreated, status_code=201)
+async def create_tickets_bulk(request: Request, service: TicketsServiceDep) -> dict:
+    """
+    Create tickets with optional nested comments in one transaction.
+
+    The body is a JSON array of tickets, or one ticket per line when sent as
+    `application/x-ndjson`. The IDs are returned in input order. Bodies over
+    `BULK_MAX_BYTES` get a 413, more than `BULK_MAX_ROWS` tickets a 422.
+    """
+    max_rows = settings.app.BULK_MAX_ROWS
+    body = await read_limited_body(request, settings.app.BULK_MAX_BYTES)
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        lines = [
+            (number, line)
+            for number, line in enumerate(body.splitlines())
+            if line.strip()
+        ]
+        if len(lines) > max_rows:
+            raise too_many_rows(max_rows)
+        tickets, errors = [], []
+        for number, line in lines:
+            try:
+                tickets.append(TicketBulkCreate.model_validate_json(line))
+            except ValidationError as exc:
+                errors.extend(
+                    {**error, "loc": ("body", number, *error["loc"])}
+                    for error in exc.errors(include_url=False)
+                )
+        if errors:
+            raise RequestValidationError(errors)
+    else:
+        try:
+            tickets = bulk_tickets_adapter.validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError(
+                [
+                    {**error, "loc": ("body", *error["loc"])}
+                    for error in exc.errors(include_url=False)
+                ]
+            )
+        if len(tickets) > max_rows:
+            raise too_many_rows(max_rows)
+
+    return {"ids": await service.create_many(tickets)}
 
 
 @tickets_router.patch("/{ticket_id}", response_model=TicketSchema)
-async def update_ticket(ticket_id: int, ticket: TicketUpdate) -> Ticket:
+async def update_ticket(
+    ticket_id: int, ticket: TicketUpdate, service: TicketsServiceDep
+) -> Ticket:
     """Update existing ticket."""
     try:
-        return await TicketsService().update(ticket_id, ticket)
+        return render(ticket_adapter, await service.update(ticket_id, ticket))
     except ValueError:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
 
 @tickets_router.delete("/{ticket_id}", status_code=204)
-async def delete_ticket(ticket_id: int) -> None:
+async def delete_ticket(ticket_id: int, service: TicketsServiceDep) -> None:
     """Delete ticket."""
     try:
-        await TicketsService().delete(ticket_id)
+        await service.delete(ticket_id)
     except ValueError:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
 
 # Comments endpoints
-@tickets_router.get("/{ticket_id}/comments", response_model=List[CommentSchema])
-async def get_ticket_comments(ticket_id: int) -> Sequence[Comment]:
-    """Get all comments for a ticket."""
+@tickets_router.get(
+    "/{ticket_id}/comments",
+    response_model=List[CommentSchema],
+    responses=NOT_MODIFIED_RESPONSES,
+)
+async def get_ticket_comments(
+    ticket_id: int,
+    service: TicketsServiceDep,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Sequence[Comment]:
+    """Get all comments for a ticket, or 304 if `If-None-Match` holds their ETag."""
     try:
-        return await TicketsService().get_comments(ticket_id)
+        if if_none_match:
+            etag = await service.get_comments_etag(ticket_id)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        comments = await service.get_comments(ticket_id)
     except ValueError:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    response.headers["ETag"] = service.comments_etag(comments)
+    return render(comments_adapter, comments, response=response)
 
 
 @tickets_router.post("/{ticket_id}/comments", response_model=CommentSchema, status_code=201)
-async def add_ticket_comment(ticket_id: int, comment: CommentCreate) -> Comment:
+async def add_ticket_comment(
+    ticket_id: int, comment: CommentCreate, service: TicketsServiceDep
+) -> Comment:
     """Add comment to ticket."""
     try:
-        return await TicketsService().add_comment(ticket_id, comment)
+        created = await service.add_comment(ticket_id, comment)
     except ValueError:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    return render(comment_adapter, created, status_code=201)
     
 
 @tickets_router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Support assistant chat.
+
+    Every text message is a question. The reply is streamed back as
+    `{"type": "token", "content": ...}` messages and finished with
+    `{"type": "done", "context": ...}`, carrying the size of the chat context
+    kept for the connection. While the assistant is busy the client first gets
+    `{"type": "queued", "position": N}`, or `{"type": "error", ...}` when the
+    wait queue is full.
+    """
     await websocket.accept()
     instance = create_openai_instance(system_prompt)
-    while True:
-        data = await websocket.receive_text()
-        await websocket.send_text(instance(data))
\ No newline at end of file
+
+    async def notify_queued(position: int) -> None:
+        await websocket.send_json({"type": "queued", "position": position})
+
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                async for token in instance(data, on_queued=notify_queued):
+                    await websocket.send_json({"type": "token", "content": token})
+            except QueueFullError:
+                await websocket.send_json(
+                    {"type": "error", "detail": "Assistant is busy, try again later"}
+                )
+                continue
+            await websocket.send_json(
+                {"type": "done", "context": instance.history.stats()}
+            )
+    except WebSocketDisconnect:
+        pass
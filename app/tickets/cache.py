@@ -0,0 +1,41 @@
+import os
+
+from app.core.config import settings
+from app.core.lib.cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    NullCacheBackend,
+    RedisCacheBackend,
+    cache_stats,
+)
+
+
+def create_cache_backend() -> CacheBackend:
+    """Build the cache backend selected by the CACHE_BACKEND setting."""
+    if settings.cache.BACKEND == "redis":
+        return RedisCacheBackend(
+            settings.cache.REDIS_URL, settings.cache.TTL_SECONDS, prefix="tickets:"
+        )
+    if settings.cache.BACKEND == "memory":
+        return MemoryCacheBackend(settings.cache.MAX_SIZE, settings.cache.TTL_SECONDS)
+    return NullCacheBackend()
+
+
+def ticket_cache_key(ticket_id: int) -> str:
+    """Cache key of the serialized ticket with the given ID."""
+    return f"ticket:{ticket_id}"
+
+
+# Serialized tickets with their comments, as returned by GET /tickets/{id}
+ticket_cache = create_cache_backend()
+cache_stats.add("tickets", ticket_cache)
+
+
+def _clear_ticket_cache_after_fork() -> None:
+    # Entries copied from the parent would never see the invalidations of
+    # this worker's siblings, a forked worker starts with an empty cache
+    if isinstance(ticket_cache, MemoryCacheBackend):
+        ticket_cache.clear()
+
+
+os.register_at_fork(after_in_child=_clear_ticket_cache_after_fork)
@@ -0,0 +1,64 @@
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence
+
+from app.core.config import settings
+from app.core.database.notifications import NotificationListener
+
+# Channel notified by the triggers of the tickets and comments tables
+CHANGES_CHANNEL = "ticket_changes"
+
+ticket_changes = NotificationListener(
+    settings.db.LISTEN_URL or settings.db.postgres_url.unicode_string(),
+    CHANGES_CHANNEL,
+    queue_size=settings.app.CHANGE_FEED_QUEUE_SIZE,
+)
+
+
+def change_filter(
+    ticket_ids: Sequence[int], statuses: Sequence[str]
+) -> Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Build the selector of a subscription, None when nothing is filtered."""
+    if not ticket_ids and not statuses:
+        return None
+    ticket_ids, statuses = frozenset(ticket_ids), frozenset(statuses)
+
+    def matches(change: Dict[str, Any]) -> bool:
+        if ticket_ids and change["ticket_id"] not in ticket_ids:
+            return False
+        # A ticket leaving a status is still reported to its followers
+        return not statuses or bool(
+            {change["status"], change["previous_status"]} & statuses
+        )
+
+    def select(notification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # A notification covers every ticket changed by one statement
+        changes = [change for change in notification["changes"] if matches(change)]
+        if not changes:
+            return None
+        return {**notification, "changes": changes}
+
+    return select
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def change_events(
+    ticket_ids: Sequence[int], statuses: Sequence[str]
+) -> AsyncIterator[str]:
+    """Stream matching changes as server-sent events until the client leaves."""
+    heartbeat = settings.app.CHANGE_FEED_HEARTBEAT_SECONDS
+    async with ticket_changes.subscribe(change_filter(ticket_ids, statuses)) as feed:
+        yield "retry: 3000\n\n"
+        while True:
+            change = await feed.get(timeout=heartbeat)
+            missed = feed.pop_missed()
+            if missed:
+                # Some changes were lost, the client has to reload what it shows
+                yield format_event("reset", {"missed": missed})
+            if change is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_event(change["type"], change)
@@ -0,0 +1,17 @@
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.engine import get_async_session
+from app.tickets.services import TicketsService
+
+
+def get_tickets_service(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> TicketsService:
+    """Tickets service bound to the session of the current request."""
+    return TicketsService(session)
+
+
+TicketsServiceDep = Annotated[TicketsService, Depends(get_tickets_service)]
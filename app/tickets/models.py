@@ -1,19 +1,31 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, String, func, Integer, Text
+from sqlalchemy import BigInteger, Boolean, Computed, DateTime, ForeignKey, Index, String, func, Integer, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.config import settings
 from app.core.database.base import Base
 
+TEXT_SEARCH_CONFIG = "russian"
+
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_ticket_id_created_at", "ticket_id", "created_at"),
+        Index("ix_comments_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     text: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     ticket_id: Mapped[int] = mapped_column(ForeignKey("tickets.id", ondelete="CASCADE"))
     username: Mapped[str] = mapped_column(String(256))
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, text)", persisted=True),
+        deferred=True,
+    )
     
     # Relationship
     ticket: Mapped["Ticket"] = relationship("Ticket", back_populates="comments")
@@ -21,11 +33,26 @@ class Comment(Base):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tickets_username_created_at_id", "username", "created_at", "id"),
+        Index("ix_tickets_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     title: Mapped[str] = mapped_column(String(256))
     description: Mapped[str] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String(256))
     username: Mapped[str] = mapped_column(String(256))
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, title), 'A')"
+            f" || setweight(to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     
     # Relationship
     comments: Mapped[list[Comment]] = relationship(
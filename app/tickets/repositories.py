@@ -1,33 +1,73 @@
-from typing import Sequence
-from sqlalchemy import select, update, delete
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Row,
+    Select,
+    case,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ts_headline, websearch_to_tsquery
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from ..core.database.engine import with_async_session
-from .models import Ticket, Comment
+from app.core.database.statements import traced_repository
+
+from .models import TEXT_SEARCH_CONFIG, Ticket, Comment
+from .schemas import SortOrder, TicketFilter
+
+
+# Ticket columns without relationships, for projections that skip the ORM
+TICKET_COLUMNS = (
+    Ticket.id,
+    Ticket.title,
+    Ticket.description,
+    Ticket.status,
+    Ticket.username,
+    Ticket.created_at,
+    Ticket.updated_at,
+)
+
 
+# Comment matches count less than matches in the ticket itself
+COMMENT_RANK_WEIGHT = 0.5
+HEADLINE_OPTIONS = "MaxWords=35, MinWords=15, MaxFragments=2"
 
+
+@traced_repository
 class CommentsRepository:
     """Repository for managing Comment objects."""
 
-    @with_async_session
-    async def create(self, comment: Comment, session: AsyncSession) -> Comment:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create(self, comment: Comment) -> Comment:
         """Create new comment."""
-        session.add(comment)
-        await session.commit()
-        await session.refresh(comment)
+        self.session.add(comment)
+        await self.session.flush()
+        await self.session.refresh(comment)
         return comment
 
-    @with_async_session
-    async def delete(self, comment: Comment, session: AsyncSession) -> None:
+    async def create_many(self, comments: Sequence[Dict[str, Any]]) -> None:
+        """Insert comments in batched multi-row INSERTs."""
+        await self.session.execute(insert(Comment), comments)
+
+    async def delete(self, comment: Comment) -> None:
         """Delete comment."""
-        await session.delete(comment)
-        await session.commit()
+        await self.session.delete(comment)
+        await self.session.flush()
 
-    @with_async_session
-    async def get_by_ticket_id(self, ticket_id: int, session: AsyncSession) -> Sequence[Comment]:
+    async def get_by_ticket_id(self, ticket_id: int) -> Sequence[Comment]:
         """Get all comments for a ticket."""
-        result = await session.execute(
+        result = await self.session.execute(
             select(Comment)
             .where(Comment.ticket_id == ticket_id)
             .order_by(Comment.created_at)
@@ -35,45 +75,216 @@ class CommentsRepository:
         return result.scalars().all()
 
 
+@traced_repository
 class TicketsRepository:
     """Repository for managing Ticket objects."""
 
-    @with_async_session
-    async def create(self, ticket: Ticket, session: AsyncSession) -> Ticket:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def create(self, ticket: Ticket) -> Ticket:
         """Create new ticket."""
-        session.add(ticket)
-        await session.commit()
+        self.session.add(ticket)
+        await self.session.flush()
         return ticket
 
-    @with_async_session
-    async def update(self, ticket: Ticket, session: AsyncSession) -> Ticket:
-        """Update existing ticket."""
-        ticket = await session.merge(ticket)
-        await session.commit()
-        await session.refresh(ticket)
-        return ticket
+    async def create_many(self, tickets: Sequence[Dict[str, Any]]) -> Sequence[int]:
+        """Insert tickets in batched multi-row INSERTs, returning IDs in input order."""
+        result = await self.session.execute(
+            insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True), tickets
+        )
+        return result.scalars().all()
+
+    async def update(
+        self, ticket_id: int, values: Dict[str, Any], load_comments: bool = False
+    ) -> Optional[Ticket]:
+        """Update ticket columns with a single UPDATE ... RETURNING statement."""
+        query = (
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(**values)
+            .returning(Ticket)
+            .execution_options(populate_existing=True)
+        )
+        if load_comments:
+            query = query.options(selectinload(Ticket.comments))
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def delete(self, ticket_id: int) -> bool:
+        """Delete ticket with a single DELETE ... RETURNING statement.
 
-    @with_async_session
-    async def delete(self, ticket: Ticket, session: AsyncSession) -> None:
-        """Delete ticket."""
-        await session.delete(ticket)
-        await session.commit()
+        Comments are removed by the ON DELETE CASCADE of the foreign key.
+        """
+        result = await self.session.execute(
+            delete(Ticket).where(Ticket.id == ticket_id).returning(Ticket.id)
+        )
+        return result.scalar_one_or_none() is not None
 
-    @with_async_session
-    async def get_by_id(self, ticket_id: int, session: AsyncSession) -> Ticket:
+    async def get_by_id(self, ticket_id: int) -> Ticket:
         """Get ticket by ID."""
-        result = await session.execute(
+        result = await self.session.execute(
             select(Ticket)
             .options(selectinload(Ticket.comments))
             .where(Ticket.id == ticket_id)
         )
         return result.scalar_one_or_none()
 
-    @with_async_session
-    async def get_all(self, session: AsyncSession) -> Sequence[Ticket]:
-        """Get all tickets."""
-        result = await session.execute(
-            select(Ticket)
+    async def exists(self, ticket_id: int) -> bool:
+        """Check that a ticket exists without loading it."""
+        result = await self.session.execute(
+            select(exists().where(Ticket.id == ticket_id))
+        )
+        return result.scalar_one()
+
+    async def get_version(
+        self, ticket_id: int
+    ) -> Optional[Row[Tuple[Optional[datetime], Optional[int], int]]]:
+        """Get the modification time, last comment ID and comment count of a ticket."""
+        result = await self.session.execute(
+            select(Ticket.updated_at, func.max(Comment.id), func.count(Comment.id))
+            .outerjoin(Comment, Comment.ticket_id == Ticket.id)
+            .where(Ticket.id == ticket_id)
+            .group_by(Ticket.id)
+        )
+        return result.one_or_none()
+
+    async def get_page(
+        self,
+        filters: TicketFilter,
+        limit: int,
+        after: Optional[Tuple[datetime, int]],
+        order: SortOrder,
+    ) -> Sequence[Ticket]:
+        """Get a page of tickets ordered by (created_at, id)."""
+        result = await self.session.execute(
+            self._page_query(select(Ticket), filters, limit, after, order)
             .options(selectinload(Ticket.comments))
         )
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+    async def get_summary_page(
+        self,
+        filters: TicketFilter,
+        limit: int,
+        after: Optional[Tuple[datetime, int]],
+        order: SortOrder,
+    ) -> Sequence[Row]:
+        """Get a page of ticket columns with comment counts, without comments."""
+        comment_count = (
+            select(func.count(Comment.id))
+            .where(Comment.ticket_id == Ticket.id)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            self._page_query(
+                select(*TICKET_COLUMNS, comment_count.label("comment_count")),
+                filters,
+                limit,
+                after,
+                order,
+            )
+        )
+        return result.all()
+
+    async def search(self, text: str, limit: int, offset: int) -> Sequence[Row]:
+        """Full-text search over tickets and their comments, best matches first."""
+        query = websearch_to_tsquery(TEXT_SEARCH_CONFIG, text)
+        # Both branches are answered by the GIN indexes
+        matches = union_all(
+            select(
+                Ticket.id.label("ticket_id"),
+                func.ts_rank(Ticket.search_vector, query).label("rank"),
+            ).where(Ticket.search_vector.bool_op("@@")(query)),
+            select(
+                Comment.ticket_id,
+                (
+                    func.ts_rank(Comment.search_vector, query) * literal(COMMENT_RANK_WEIGHT)
+                ).label("rank"),
+            ).where(Comment.search_vector.bool_op("@@")(query)),
+        ).subquery()
+        ranked = (
+            select(matches.c.ticket_id, func.sum(matches.c.rank).label("rank"))
+            .group_by(matches.c.ticket_id)
+            .order_by(func.sum(matches.c.rank).desc(), matches.c.ticket_id.desc())
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        # Tickets matched only through comments are highlighted in their best comment
+        best_comment = (
+            select(Comment.text)
+            .where(
+                Comment.ticket_id == Ticket.id,
+                Comment.search_vector.bool_op("@@")(query),
+            )
+            .order_by(func.ts_rank(Comment.search_vector, query).desc(), Comment.id)
+            .limit(1)
+            .correlate(Ticket)
+            .scalar_subquery()
+        )
+        headline_source = case(
+            (
+                Ticket.search_vector.bool_op("@@")(query),
+                Ticket.title + " " + Ticket.description,
+            ),
+            else_=func.coalesce(best_comment, Ticket.description),
+        )
+        # Headlines are expensive, so they are built for the requested page only
+        result = await self.session.execute(
+            select(
+                *TICKET_COLUMNS,
+                ranked.c.rank,
+                ts_headline(
+                    TEXT_SEARCH_CONFIG, headline_source, query, HEADLINE_OPTIONS
+                ).label("headline"),
+            )
+            .join(ranked, ranked.c.ticket_id == Ticket.id)
+            .order_by(ranked.c.rank.desc(), Ticket.id.desc())
+        )
+        return result.all()
+
+    async def stream(
+        self, filters: TicketFilter, batch_size: int
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Stream ticket columns from a server-side cursor in batches."""
+        result = await self.session.stream(
+            self._filter_query(select(*TICKET_COLUMNS), filters)
+            .order_by(Ticket.created_at, Ticket.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    def _filter_query(query: Select, filters: TicketFilter) -> Select:
+        """Apply the list filters to a tickets query."""
+        if filters.status is not None:
+            query = query.where(Ticket.status == filters.status)
+        if filters.username is not None:
+            query = query.where(Ticket.username == filters.username)
+        return query
+
+    @classmethod
+    def _page_query(
+        cls,
+        query: Select,
+        filters: TicketFilter,
+        limit: int,
+        after: Optional[Tuple[datetime, int]],
+        order: SortOrder,
+    ) -> Select:
+        """Apply filters, keyset position, ordering and limit to a tickets query."""
+        query = cls._filter_query(query, filters)
+
+        key = tuple_(Ticket.created_at, Ticket.id)
+        if order == SortOrder.DESC:
+            if after is not None:
+                query = query.where(key < tuple_(*after))
+            query = query.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        else:
+            if after is not None:
+                query = query.where(key > tuple_(*after))
+            query = query.order_by(Ticket.created_at, Ticket.id)
+
+        return query.limit(limit)
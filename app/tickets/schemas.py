@@ -1,6 +1,7 @@
 from typing import Optional
 
 from datetime import datetime
+from enum import StrEnum
 from typing import Optional, List
 
 from pydantic import BaseModel
@@ -35,6 +36,14 @@ class TicketCreate(TicketBase):
     pass
 
 
+class TicketBulkCreate(TicketCreate):
+    comments: List[CommentCreate] = []
+
+
+class TicketBulkCreated(BaseModel):
+    ids: List[int]
+
+
 class TicketUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -49,6 +58,63 @@ class Ticket(TicketBase):
 
     class Config:
         from_attributes = True
+
+
+class SortOrder(StrEnum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class TicketFilter(BaseModel):
+    status: Optional[str] = None
+    username: Optional[str] = None
+
+
+class TicketPage(BaseModel):
+    items: List[Ticket]
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TicketRead(TicketBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TicketSummary(TicketRead):
+    comment_count: int
+
+
+class TicketSummaryPage(BaseModel):
+    items: List[TicketSummary]
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TicketSearchResult(TicketRead):
+    rank: float
+    headline: str
+
+
+class TicketSearchPage(BaseModel):
+    items: List[TicketSearchResult]
+    next_offset: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
 class UpdateTicket(BaseModel):
     title: Optional[str]
     status: Optional[str]
\ No newline at end of file
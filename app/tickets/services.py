@@ -1,14 +1,39 @@
-from typing import Sequence
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence, Tuple
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.engine import pin_to_primary
+from app.core.lib.cache import CacheBackend
+from app.core.lib.etag import make_etag
+from app.tickets.cache import ticket_cache, ticket_cache_key
 from app.tickets.models import Ticket, Comment
 from app.tickets.repositories import TicketsRepository, CommentsRepository
-from app.tickets.schemas import TicketCreate, TicketUpdate, CommentCreate
+from app.tickets.schemas import (
+    CommentCreate,
+    ExportFormat,
+    SortOrder,
+    Ticket as TicketSchema,
+    TicketBulkCreate,
+    TicketCreate,
+    TicketFilter,
+    TicketRead,
+    TicketUpdate,
+)
+from app.utils.pagination import Page, encode_cursor
 
 
 class CommentsService:
     """Service layer for managing comments."""
 
-    repository = CommentsRepository()
+    def __init__(
+        self, session: AsyncSession, cache: CacheBackend = ticket_cache
+    ) -> None:
+        self.session = session
+        self.repository = CommentsRepository(session)
+        self.cache = cache
 
     async def create(self, ticket_id: int, comment_data: CommentCreate) -> Comment:
         """Create new comment."""
@@ -17,7 +42,11 @@ class CommentsService:
             username=comment_data.username,
             ticket_id=ticket_id
         )
-        return await self.repository.create(comment)
+        comment = await self.repository.create(comment)
+        await self.session.commit()
+        # Cached tickets embed their comments
+        await self.cache.delete(ticket_cache_key(ticket_id))
+        return comment
 
     async def get_by_ticket_id(self, ticket_id: int) -> Sequence[Comment]:
         """Get all comments for a ticket."""
@@ -26,17 +55,92 @@ class CommentsService:
     async def delete(self, comment: Comment) -> None:
         """Delete comment."""
         await self.repository.delete(comment)
+        await self.session.commit()
+        await self.cache.delete(ticket_cache_key(comment.ticket_id))
 
 
 class TicketsService:
-    """Service layer for managing tickets."""
+    """
+    Service layer for managing tickets.
+
+    All repositories share the session of the service, so every public write
+    method runs in a single transaction and commits exactly once. Writes drop
+    the cached ticket only after the commit, so a concurrent read cannot put
+    the old version back for longer than the cache TTL.
+    """
+
+    def __init__(
+        self, session: AsyncSession, cache: CacheBackend = ticket_cache
+    ) -> None:
+        self.session = session
+        self.repository = TicketsRepository(session)
+        self.comments_service = CommentsService(session, cache)
+        self.cache = cache
+
+    async def get_page(
+        self,
+        filters: TicketFilter,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Page[Ticket]:
+        """Get a page of tickets starting after the given keyset position."""
+        # Fetch one extra row to learn whether another page exists
+        tickets = await self.repository.get_page(filters, limit + 1, after, order)
+        return self._to_page(tickets, limit)
+
+    async def get_summary_page(
+        self,
+        filters: TicketFilter,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        order: SortOrder = SortOrder.DESC,
+    ) -> Page[Any]:
+        """Get a page of ticket summaries with comment counts."""
+        rows = await self.repository.get_summary_page(filters, limit + 1, after, order)
+        return self._to_page(rows, limit)
+
+    async def search(self, text: str, limit: int, offset: int = 0) -> Page[Any]:
+        """Search tickets by text, ranked by relevance."""
+        rows = await self.repository.search(text, limit + 1, offset)
+        if len(rows) <= limit:
+            return Page(items=rows)
+        return Page(items=rows[:limit], next_offset=offset + limit)
+
+    async def export(
+        self, filters: TicketFilter, export_format: ExportFormat, batch_size: int = 1000
+    ) -> AsyncIterator[bytes]:
+        """Export tickets as NDJSON or CSV chunks, one chunk per fetched batch."""
+        fields = list(TicketRead.model_fields)
+        if export_format == ExportFormat.CSV:
+            yield self._csv_chunk([fields])
+
+        async for rows in self.repository.stream(filters, batch_size):
+            if export_format == ExportFormat.CSV:
+                yield self._csv_chunk(
+                    [[getattr(row, field) for field in fields] for row in rows]
+                )
+            else:
+                yield b"".join(
+                    TicketRead.model_validate(row).model_dump_json().encode() + b"\n"
+                    for row in rows
+                )
 
-    repository = TicketsRepository()
-    comments_service = CommentsService()
+    @staticmethod
+    def _csv_chunk(rows: Sequence[Sequence[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
 
-    async def get_all(self) -> Sequence[Ticket]:
-        """Get all tickets."""
-        return await self.repository.get_all()
+    @staticmethod
+    def _to_page(rows: Sequence[Any], limit: int) -> Page[Any]:
+        """Cut the lookahead row off and build the cursor for the next page."""
+        if len(rows) <= limit:
+            return Page(items=rows)
+
+        rows = rows[:limit]
+        last = rows[-1]
+        return Page(items=rows, next_cursor=encode_cursor(last.created_at, last.id))
 
     async def get_by_id(self, ticket_id: int) -> Ticket:
         """Get ticket by ID."""
@@ -45,6 +149,44 @@ class TicketsService:
             raise ValueError(f"Ticket with id {ticket_id} not found")
         return ticket
 
+    async def get_cached(self, ticket_id: int) -> TicketSchema:
+        """Get ticket by ID through the read-through cache."""
+        key = ticket_cache_key(ticket_id)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return TicketSchema.model_validate_json(cached)
+
+        # A replica may not have caught up with the write that invalidated the
+        # entry, what is cached here is served for the whole TTL
+        pin_to_primary(self.session)
+        ticket = TicketSchema.model_validate(await self.get_by_id(ticket_id))
+        await self.cache.set(key, ticket.model_dump_json().encode())
+        return ticket
+
+    async def get_ticket_etag(self, ticket_id: int) -> str:
+        """Get the ETag of a ticket from its version, without loading it."""
+        updated_at, last_comment_id, comment_count = await self._get_version(ticket_id)
+        return make_etag("ticket", updated_at, last_comment_id, comment_count)
+
+    async def get_comments_etag(self, ticket_id: int) -> str:
+        """Get the ETag of the comments of a ticket, without loading them."""
+        _, last_comment_id, comment_count = await self._get_version(ticket_id)
+        return make_etag("comments", last_comment_id, comment_count)
+
+    @staticmethod
+    def ticket_etag(ticket: TicketSchema) -> str:
+        """ETag of a loaded ticket, equal to get_ticket_etag for the same state."""
+        last_comment_id = max((comment.id for comment in ticket.comments), default=None)
+        return make_etag(
+            "ticket", ticket.updated_at, last_comment_id, len(ticket.comments)
+        )
+
+    @staticmethod
+    def comments_etag(comments: Sequence[Comment]) -> str:
+        """ETag of loaded comments, equal to get_comments_etag for the same state."""
+        last_comment_id = max((comment.id for comment in comments), default=None)
+        return make_etag("comments", last_comment_id, len(comments))
+
     async def create(self, ticket_data: TicketCreate) -> Ticket:
         """Create new ticket."""
         ticket = Ticket(
@@ -53,32 +195,75 @@ class TicketsService:
             status=ticket_data.status,
             username=ticket_data.username
         )
-        return await self.repository.create(ticket)
+        ticket = await self.repository.create(ticket)
+        await self.session.commit()
+        return ticket
+
+    async def create_many(self, tickets_data: Sequence[TicketBulkCreate]) -> Sequence[int]:
+        """Create tickets with their comments in one transaction."""
+        if not tickets_data:
+            return []
+
+        ids = await self.repository.create_many(
+            [ticket.model_dump(exclude={"comments"}) for ticket in tickets_data]
+        )
+        comments = [
+            {**comment.model_dump(), "ticket_id": ticket_id}
+            for ticket_id, ticket in zip(ids, tickets_data)
+            for comment in ticket.comments
+        ]
+        if comments:
+            await self.comments_service.repository.create_many(comments)
+        await self.session.commit()
+        return ids
 
     async def update(self, ticket_id: int, ticket_data: TicketUpdate) -> Ticket:
         """Update existing ticket."""
-        ticket = await self.get_by_id(ticket_id)
-        
         # Update only provided fields
         update_data = ticket_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(ticket, field, value)
-        
-        return await self.repository.update(ticket)
+        if not update_data:
+            return await self.get_by_id(ticket_id)
+
+        # The updated ticket is returned with its comments embedded
+        ticket = await self.repository.update(ticket_id, update_data, load_comments=True)
+        if not ticket:
+            raise ValueError(f"Ticket with id {ticket_id} not found")
+        await self.session.commit()
+        await self.cache.delete(ticket_cache_key(ticket_id))
+        return ticket
 
     async def delete(self, ticket_id: int) -> None:
         """Delete ticket by ID."""
-        ticket = await self.get_by_id(ticket_id)
-        await self.repository.delete(ticket)
+        if not await self.repository.delete(ticket_id):
+            raise ValueError(f"Ticket with id {ticket_id} not found")
+        await self.session.commit()
+        await self.cache.delete(ticket_cache_key(ticket_id))
 
     async def add_comment(self, ticket_id: int, comment_data: CommentCreate) -> Comment:
         """Add comment to ticket."""
-        # Verify ticket exists
-        await self.get_by_id(ticket_id)
+        # The ticket may be too new for a replica to know it
+        pin_to_primary(self.session)
+        await self._ensure_exists(ticket_id)
         return await self.comments_service.create(ticket_id, comment_data)
 
     async def get_comments(self, ticket_id: int) -> Sequence[Comment]:
         """Get all comments for a ticket."""
-        # Verify ticket exists
-        await self.get_by_id(ticket_id)
-        return await self.comments_service.get_by_ticket_id(ticket_id)
\ No newline at end of file
+        comments = await self.comments_service.get_by_ticket_id(ticket_id)
+        # An empty list is ambiguous only then: no comments or no ticket
+        if not comments:
+            await self._ensure_exists(ticket_id)
+        return comments
+
+    async def _get_version(
+        self, ticket_id: int
+    ) -> Tuple[Optional[datetime], Optional[int], int]:
+        """Get the version of a ticket, raise if the ticket does not exist."""
+        version = await self.repository.get_version(ticket_id)
+        if not version:
+            raise ValueError(f"Ticket with id {ticket_id} not found")
+        return version.tuple()
+
+    async def _ensure_exists(self, ticket_id: int) -> None:
+        """Raise if the ticket does not exist, without hydrating it."""
+        if not await self.repository.exists(ticket_id):
+            raise ValueError(f"Ticket with id {ticket_id} not found")
@@ -0,0 +1,57 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Generic, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# IDs are Postgres bigints
+MAX_ID = 2**63 - 1
+
+
+class Page(NamedTuple, Generic[T]):
+    """A single page of a keyset- or offset-paginated listing."""
+
+    items: Sequence[T]
+    next_cursor: Optional[str] = None
+    next_offset: Optional[int] = None
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    Encodes a keyset position into an opaque, URL-safe cursor.
+
+    Args:
+        created_at (datetime): The creation time of the last item on the page.
+        item_id (int): The ID of the last item on the page.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+
+    Returns:
+        Tuple[datetime, int]: The keyset position stored in the cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        item_id = int(item_id)
+        if not 1 <= item_id <= MAX_ID:
+            raise ValueError(f"ID {item_id} is out of range")
+        return datetime.fromisoformat(created_at), item_id
+    except (binascii.Error, OverflowError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor {cursor!r}") from exc
@@ -0,0 +1,357 @@
+"""
+Load driver for the tickets API.
+
+Runs every scenario in turn for a fixed time with a fixed number of
+concurrent workers against a running application, then prints a JSON report
+with throughput, error counts and p50/p95/p99 latencies per scenario, tagged
+with the current commit so reports of two commits can be compared.
+
+Typical run, from the repository root:
+    python -m benchmarks.stub_llm &
+    python -m benchmarks.seed --truncate
+    LLM_BASE_URL=http://127.0.0.1:11500/v1 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load --concurrency 32 --duration 20 --output report.json
+
+The database must be seeded first: the scenarios read and update existing
+tickets. Writing scenarios add rows, reseed with --truncate between runs that
+are meant to be compared.
+
+Usage:
+    python -m benchmarks.load [--base-url URL] [--concurrency N] [--duration S]
+        [--scenarios get,search,...] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+import websockets
+
+from benchmarks.seed import PROBLEMS, SUBJECTS, make_ticket
+
+API_PREFIX = "/api/v1/tickets"
+QUESTIONS = (
+    "Как вернуть товар, который пришёл повреждённым?",
+    "Почему с карты списали деньги дважды?",
+    "Как связаться с продавцом, если он не отвечает?",
+    "Где посмотреть статус моего заказа?",
+)
+
+
+@dataclass
+class Context:
+    """State shared by the workers of a run."""
+
+    client: httpx.AsyncClient
+    ws_url: str
+    ticket_ids: List[int]
+    rng: random.Random
+    cursor: Optional[str] = None
+    etags: Dict[int, str] = field(default_factory=dict)
+    sequence: int = 0
+
+    def ticket_id(self) -> int:
+        return self.rng.choice(self.ticket_ids)
+
+    def next_number(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+
+@dataclass
+class Stats:
+    """Measurements of one scenario."""
+
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    extra: Dict[str, List[float]] = field(default_factory=dict)
+
+
+# A scenario performs one operation. It may return the latency to record when
+# only part of its work should be measured, otherwise the whole call is timed.
+Scenario = Callable[[Context, Stats], Awaitable[Optional[float]]]
+
+
+async def request(
+    ctx: Context, method: str, path: str, **kwargs: Any
+) -> httpx.Response:
+    response = await ctx.client.request(method, API_PREFIX + path, **kwargs)
+    # 304 answers a conditional request, it is a success for the driver
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def new_ticket(ctx: Context) -> Dict[str, Any]:
+    ticket = make_ticket(ctx.rng, datetime.now(timezone.utc))
+    return {key: ticket[key] for key in ("title", "description", "status", "username")}
+
+
+async def scenario_list(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "GET", "/", params={"limit": 20})
+
+
+async def scenario_list_next_page(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "GET", "/", params={"limit": 20, "cursor": ctx.cursor})
+
+
+async def scenario_list_filtered(ctx: Context, stats: Stats) -> None:
+    username = f"user{ctx.rng.randint(1, 2000)}"
+    params = {"limit": 20, "status": "open", "username": username}
+    await request(ctx, "GET", "/", params=params)
+
+
+async def scenario_summary(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "GET", "/summary", params={"limit": 20})
+
+
+async def scenario_search(ctx: Context, stats: Stats) -> None:
+    query = f"{ctx.rng.choice(SUBJECTS)} {ctx.rng.choice(PROBLEMS).split()[-1]}"
+    await request(ctx, "GET", "/search", params={"q": query, "limit": 20})
+
+
+async def scenario_export(ctx: Context, stats: Stats) -> None:
+    params = {"username": f"user{ctx.rng.randint(1, 2000)}", "format": "ndjson"}
+    url = API_PREFIX + "/export"
+    async with ctx.client.stream("GET", url, params=params) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_raw():
+            pass
+
+
+async def scenario_get(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "GET", f"/{ctx.ticket_id()}")
+
+
+async def scenario_get_conditional(ctx: Context, stats: Stats) -> None:
+    ticket_id = ctx.ticket_id()
+    etag = ctx.etags.get(ticket_id)
+    headers = {"If-None-Match": etag} if etag else {}
+    response = await request(ctx, "GET", f"/{ticket_id}", headers=headers)
+    if "etag" in response.headers:
+        ctx.etags[ticket_id] = response.headers["etag"]
+
+
+async def scenario_comments(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "GET", f"/{ctx.ticket_id()}/comments")
+
+
+async def scenario_create(ctx: Context, stats: Stats) -> None:
+    await request(ctx, "POST", "/", json=new_ticket(ctx))
+
+
+async def scenario_bulk(ctx: Context, stats: Stats) -> None:
+    payload = []
+    for _ in range(50):
+        ticket = new_ticket(ctx)
+        comment = {"text": "Первое сообщение", "username": ticket["username"]}
+        payload.append({**ticket, "comments": [comment]})
+    await request(ctx, "POST", "/bulk", json=payload)
+
+
+async def scenario_update(ctx: Context, stats: Stats) -> None:
+    status = ctx.rng.choice(("open", "in_progress", "closed"))
+    await request(ctx, "PATCH", f"/{ctx.ticket_id()}", json={"status": status})
+
+
+async def scenario_add_comment(ctx: Context, stats: Stats) -> None:
+    payload = {"text": "Есть новости по обращению?", "username": "user1"}
+    await request(ctx, "POST", f"/{ctx.ticket_id()}/comments", json=payload)
+
+
+async def scenario_delete(ctx: Context, stats: Stats) -> float:
+    created = (await request(ctx, "POST", "/", json=new_ticket(ctx))).json()
+    # Only the delete is measured, the ticket is created just for it
+    started = time.perf_counter()
+    await request(ctx, "DELETE", f"/{created['id']}")
+    return time.perf_counter() - started
+
+
+async def scenario_websocket(ctx: Context, stats: Stats) -> None:
+    # A unique question per message, the assistant caches repeated ones
+    question = f"{ctx.rng.choice(QUESTIONS)} ({ctx.next_number()})"
+    async with websockets.connect(ctx.ws_url) as websocket:
+        started = time.perf_counter()
+        await websocket.send(question)
+        first_token = True
+        while True:
+            message = json.loads(await websocket.recv())
+            if message["type"] == "token" and first_token:
+                ttft = time.perf_counter() - started
+                stats.extra.setdefault("ttft", []).append(ttft)
+                first_token = False
+            elif message["type"] == "error":
+                raise RuntimeError(message["detail"])
+            elif message["type"] == "done":
+                return
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "list": scenario_list,
+    "list_next_page": scenario_list_next_page,
+    "list_filtered": scenario_list_filtered,
+    "summary": scenario_summary,
+    "search": scenario_search,
+    "export": scenario_export,
+    "get": scenario_get,
+    "get_conditional": scenario_get_conditional,
+    "comments": scenario_comments,
+    "create": scenario_create,
+    "bulk": scenario_bulk,
+    "update": scenario_update,
+    "add_comment": scenario_add_comment,
+    "delete": scenario_delete,
+    "websocket": scenario_websocket,
+}
+
+
+def percentile(values: Sequence[float], share: float) -> float:
+    """Nearest-rank percentile of the values, share between 0 and 1."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)), 1) - 1]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 0.50) * 1000, 3),
+        "p95": round(percentile(values, 0.95) * 1000, 3),
+        "p99": round(percentile(values, 0.99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3),
+        "max": round(max(values) * 1000, 3),
+    }
+
+
+async def run_scenario(
+    ctx: Context, scenario: Scenario, concurrency: int, duration: float, warmup: float
+) -> Dict[str, Any]:
+    """Run a scenario with `concurrency` workers, measuring after the warm-up."""
+    stats = Stats()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < stop_at:
+            call_started = time.perf_counter()
+            try:
+                latency = await scenario(ctx, stats)
+            except Exception:  # noqa: B902, every failure counts as an error
+                if call_started >= measure_from:
+                    stats.errors += 1
+                continue
+            if call_started >= measure_from:
+                if latency is None:
+                    latency = time.perf_counter() - call_started
+                stats.latencies.append(latency)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    return {
+        "requests": len(stats.latencies),
+        "errors": stats.errors,
+        "throughput_rps": round(len(stats.latencies) / elapsed, 2),
+        "latency_ms": summarize(stats.latencies),
+        **{f"{name}_ms": summarize(values) for name, values in stats.extra.items()},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        first_page = (
+            await client.get(API_PREFIX + "/", params={"limit": args.sample})
+        ).json()
+        ticket_ids = [ticket["id"] for ticket in first_page["items"]]
+        if not ticket_ids:
+            raise SystemExit("No tickets found, run `python -m benchmarks.seed` first")
+
+        ctx = Context(
+            client=client,
+            ws_url=args.base_url.replace("http", "ws", 1) + API_PREFIX + "/ws",
+            ticket_ids=ticket_ids,
+            rng=random.Random(args.seed),
+            cursor=first_page["next_cursor"],
+        )
+
+        results = {}
+        for name in args.scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = await run_scenario(
+                ctx, SCENARIOS[name], args.concurrency, args.duration, args.warmup
+            )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--duration", type=float, default=10, help="Seconds per scenario"
+    )
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--sample", type=int, default=100, help="Tickets to read")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help="Comma-separated, all by default: " + ",".join(SCENARIOS),
+    )
+    parser.add_argument("--output", help="Write the JSON report here, not to stdout")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(load_test(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Seeds the database with a reproducible volume of tickets and comments.
+
+Uses the database configured through the DB_* variables, applies the
+migrations first and inserts through the application repositories. The same
+`--seed` always produces the same data, so runs on different commits start
+from identical tables. Full-text search needs the generated tsvector columns,
+so the target has to be Postgres.
+
+Usage:
+    python -m benchmarks.seed [--tickets 20000] [--comments 5] [--truncate]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+SUBJECTS = (
+    "заказ",
+    "оплата",
+    "доставка",
+    "возврат",
+    "товар",
+    "магазин",
+    "отзыв",
+    "аккаунт",
+    "промокод",
+    "посылка",
+)
+PROBLEMS = (
+    "не пришёл вовремя",
+    "списали дважды",
+    "пришёл повреждённым",
+    "не отображается в личном кабинете",
+    "продавец не отвечает",
+    "не получается отменить",
+    "статус не меняется неделю",
+    "не работает при оформлении",
+)
+DETAILS = (
+    "Оформил заказ на керамическую вазу ручной работы, продавец подтвердил отправку.",
+    "Трек-номер не отслеживается, в поддержке службы доставки ничего не знают.",
+    "Деньги списались с карты, но в истории заказов ничего нет.",
+    "Упаковка была целой, а сам товар внутри разбит на несколько частей.",
+    "Пробовал с телефона и с компьютера, ошибка повторяется каждый раз.",
+    "Прикладываю фотографии и скриншот переписки с продавцом.",
+    "Прошу вернуть деньги или отправить замену как можно скорее.",
+)
+REPLIES = (
+    "Спасибо за обращение, мы проверим информацию и вернёмся с ответом.",
+    "Уточните, пожалуйста, номер заказа и дату оплаты.",
+    "Мы связались с продавцом, ожидаем ответа в течение суток.",
+    "Возврат оформлен, деньги поступят на карту в течение 10 дней.",
+    "Проблема решена, закрываем обращение. Хорошего дня!",
+)
+STATUSES = ("open", "open", "open", "in_progress", "in_progress", "closed")
+
+
+def make_ticket(rng: random.Random, created_at: datetime) -> Dict[str, Any]:
+    subject, problem = rng.choice(SUBJECTS), rng.choice(PROBLEMS)
+    return {
+        "title": f"{subject.capitalize()} {problem}",
+        "description": " ".join(rng.sample(DETAILS, rng.randint(2, 5))),
+        "status": rng.choice(STATUSES),
+        "username": f"user{rng.randint(1, 2000)}",
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_comments(
+    rng: random.Random, ticket_id: int, created_at: datetime, average: int
+) -> List[Dict[str, Any]]:
+    comments = []
+    for number in range(rng.randint(0, average * 2)):
+        comment_at = created_at + timedelta(minutes=15 * (number + 1))
+        # Support and the customer take turns
+        username = "support" if number % 2 == 0 else f"user{rng.randint(1, 2000)}"
+        comments.append(
+            {
+                "ticket_id": ticket_id,
+                "text": rng.choice(REPLIES),
+                "username": username,
+                "created_at": comment_at,
+                "updated_at": comment_at,
+            }
+        )
+    return comments
+
+
+async def seed(
+    tickets: int, comments: int, batch_size: int, seed_value: int, truncate: bool
+) -> None:
+    from app.core.database.engine import async_session_maker
+    from app.tickets.repositories import CommentsRepository, TicketsRepository
+
+    rng = random.Random(seed_value)
+    # Spread over a year, so keyset pages and date filters look realistic
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    step = timedelta(days=365) / max(tickets, 1)
+    started = time.perf_counter()
+
+    async with async_session_maker() as session:
+        if truncate:
+            await session.execute(
+                text("TRUNCATE comments, tickets RESTART IDENTITY CASCADE")
+            )
+            await session.commit()
+
+        created_tickets = created_comments = 0
+        for offset in range(0, tickets, batch_size):
+            count = min(batch_size, tickets - offset)
+            dates = [start + step * (offset + number) for number in range(count)]
+            ids = await TicketsRepository(session).create_many(
+                [make_ticket(rng, created_at) for created_at in dates]
+            )
+            batch_comments = [
+                comment
+                for ticket_id, created_at in zip(ids, dates)
+                for comment in make_comments(rng, ticket_id, created_at, comments)
+            ]
+            if batch_comments:
+                await CommentsRepository(session).create_many(batch_comments)
+            await session.commit()
+            created_tickets += len(ids)
+            created_comments += len(batch_comments)
+
+        await session.execute(text("ANALYZE tickets"))
+        await session.execute(text("ANALYZE comments"))
+        await session.commit()
+
+    print(
+        f"Seeded {created_tickets} tickets and {created_comments} comments"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickets", type=int, default=20_000)
+    parser.add_argument("--comments", type=int, default=5, help="Average per ticket")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="Empty tables first")
+    args = parser.parse_args()
+
+    from app.utils.alembic_helpers import apply_migrations
+
+    apply_migrations()
+    asyncio.run(
+        seed(args.tickets, args.comments, args.batch_size, args.seed, args.truncate)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Per-request CPU time of rendering ticket pages.
+
+Compares FastAPI's `response_model` path (validation from attributes,
+conversion to Python primitives, stdlib `json`) with `json_response`, which
+validates and dumps in one pydantic-core pass. Both render the same
+TicketPage of transient ORM tickets with embedded comments, no database is
+involved.
+
+Usage:
+    python -m benchmarks.serialization [--tickets 1000] [--comments 3]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from app.core.lib.serialization import json_response
+from app.tickets.models import Comment, Ticket
+from app.tickets.schemas import TicketPage
+from app.utils.pagination import Page
+
+
+def make_page(tickets: int, comments: int) -> Page[Ticket]:
+    """Build a page of transient tickets, each with a few comments."""
+    now = datetime.now(timezone.utc)
+    items = []
+    for ticket_id in range(1, tickets + 1):
+        created_at = now - timedelta(minutes=ticket_id)
+        ticket = Ticket(
+            id=ticket_id,
+            title=f"Заказ {ticket_id} не пришёл",
+            description="Оплатил неделю назад, статус заказа не меняется. " * 4,
+            status="open",
+            username=f"user{ticket_id % 97}",
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        ticket.comments = [
+            Comment(
+                id=ticket_id * comments + number,
+                ticket_id=ticket_id,
+                text="Проверим и вернёмся с ответом в течение дня.",
+                username="support",
+                created_at=created_at,
+            )
+            for number in range(comments)
+        ]
+        items.append(ticket)
+    return Page(items=items, next_cursor="cursor")
+
+
+def measure(render: Callable[[], bytes], repeat: int) -> List[float]:
+    """CPU seconds of every call, after one warm-up call."""
+    render()
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        render()
+        timings.append(time.process_time() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--comments", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page = make_page(args.tickets, args.comments)
+    field = create_model_field(
+        name="Response", type_=TicketPage, mode="serialization"
+    )
+    adapter = TypeAdapter(TicketPage)
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=page)
+        )
+        return JSONResponse(content).body
+
+    def fast_path() -> bytes:
+        return json_response(adapter, page).body
+
+    assert fastapi_path() == fast_path(), "Both paths must render the same body"
+
+    results = {
+        "response_model": measure(fastapi_path, args.repeat),
+        "json_response": measure(fast_path, args.repeat),
+    }
+    baseline = min(results["response_model"])
+    print(f"{args.tickets} tickets x {args.comments} comments, best of {args.repeat}")
+    for name, timings in results.items():
+        best, median = min(timings), sorted(timings)[len(timings) // 2]
+        print(
+            f"  {name:<15} {best * 1000:8.2f} ms/request"
+            f"  (median {median * 1000:.2f} ms, {baseline / best:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Stub of an OpenAI-compatible chat completions endpoint.
+
+Stands in for Ollama during load tests: answers every request with a canned
+Russian reply after a configurable time to first token, streaming it token by
+token when asked to, and reports usage like the real API. Point the
+application at it with LLM_BASE_URL=http://<host>:<port>/v1.
+
+Usage:
+    python -m benchmarks.stub_llm [--port 11500] [--ttft 0.2] [--token-delay 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+REPLY = (
+    "Вы можете открыть спор в разделе «Мои заказы». Опишите проблему и "
+    "загрузите фото повреждения. Если продавец не отвечает в течение 48 часов, "
+    "наша поддержка поможет вам. Хотите, чтобы я передал ваш случай оператору?"
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a reply into word-sized tokens, keeping the spaces."""
+    words = text.split(" ")
+    return [word if number == 0 else f" {word}" for number, word in enumerate(words)]
+
+
+def create_app(ttft: float = 0.2, token_delay: float = 0.02, reply: str = REPLY):
+    """
+    Builds the stub application.
+
+    Args:
+        ttft (float, optional): Seconds before the first token. Defaults to 0.2.
+        token_delay (float, optional): Seconds between tokens. Defaults to 0.02.
+        reply (str, optional): The reply to every request. Defaults to REPLY.
+    """
+    tokens = tokenize(reply)
+
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt_tokens = sum(len(message["content"]) // 3 + 4 for message in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "system_fingerprint": "stub",
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + token_delay * len(tokens))
+            return JSONResponse(
+                {
+                    **completion,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": reply},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta: Dict[str, Any], finish_reason: Any = None) -> bytes:
+            data = {
+                **completion,
+                "object": "chat.completion.chunk",
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+        async def events() -> AsyncIterator[bytes]:
+            await asyncio.sleep(ttft)
+            for number, token in enumerate(tokens):
+                if number:
+                    await asyncio.sleep(token_delay)
+                yield chunk({"role": "assistant", "content": token})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                data = {**completion, "object": "chat.completion.chunk"}
+                data.update(choices=[], usage=usage)
+                yield f"data: {json.dumps(data)}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(
+        routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(args.ttft, args.token_delay),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""add ticket and comment indexes
+
+Revision ID: 37902d227112
+Revises: 92db112a8e25
+Create Date: 2026-10-17 09:30:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '37902d227112'
+down_revision: Union[str, None] = '92db112a8e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_comments_ticket_id_created_at', 'comments', ['ticket_id', 'created_at']),
+    ('ix_tickets_created_at_id', 'tickets', ['created_at', 'id']),
+    ('ix_tickets_status_created_at_id', 'tickets', ['status', 'created_at', 'id']),
+    ('ix_tickets_username_created_at_id', 'tickets', ['username', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while the indexes are built,
+    # but it cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
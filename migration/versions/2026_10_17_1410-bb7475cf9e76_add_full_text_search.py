@@ -0,0 +1,77 @@
+"""add full text search
+
+Revision ID: bb7475cf9e76
+Revises: 37902d227112
+Create Date: 2026-10-17 14:10:45.203917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb7475cf9e76'
+down_revision: Union[str, None] = '37902d227112'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated columns rewrite both tables once
+    op.add_column('tickets', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian'::regconfig, title), 'A')"
+            " || setweight(to_tsvector('russian'::regconfig, description), 'B')",
+            persisted=True,
+        ),
+        nullable=False,
+    ))
+    op.add_column('comments', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian'::regconfig, text)", persisted=True),
+        nullable=False,
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_search_vector',
+            'tickets',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_comments_search_vector',
+            'comments',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_comments_search_vector',
+            table_name='comments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_tickets_search_vector',
+            table_name='tickets',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('comments', 'search_vector')
+    op.drop_column('tickets', 'search_vector')
@@ -0,0 +1,132 @@
+"""add change notifications
+
+Revision ID: bb1091b822b4
+Revises: bb7475cf9e76
+Create Date: 2026-10-17 18:30:12.481920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bb1091b822b4'
+down_revision: Union[str, None] = 'bb7475cf9e76'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Statement-level triggers: a bulk insert, an update of many rows or the
+    # cascade of a deleted ticket sends one notification per statement, not
+    # one per row. The changes are grouped by ticket and split over several
+    # notifications only when they exceed the 8000-byte payload limit.
+    op.execute("""
+        CREATE FUNCTION notify_ticket_entries(kind text, action text, entries json[])
+        RETURNS void AS $$
+        DECLARE
+            entry json;
+            chunk json[] := '{}';
+            chunk_size int := 0;
+        BEGIN
+            IF entries IS NULL THEN
+                RETURN;
+            END IF;
+            FOREACH entry IN ARRAY entries LOOP
+                IF chunk_size > 0 AND chunk_size + octet_length(entry::text) > 7000 THEN
+                    PERFORM pg_notify('ticket_changes', json_build_object(
+                        'type', kind, 'action', action, 'changes', to_json(chunk)
+                    )::text);
+                    chunk := '{}';
+                    chunk_size := 0;
+                END IF;
+                chunk := array_append(chunk, entry);
+                chunk_size := chunk_size + octet_length(entry::text) + 1;
+            END LOOP;
+            PERFORM pg_notify('ticket_changes', json_build_object(
+                'type', kind, 'action', action, 'changes', to_json(chunk)
+            )::text);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION notify_ticket_changes() RETURNS trigger AS $$
+        DECLARE
+            entries json[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(json_build_object(
+                    'ticket_id', id, 'status', status, 'previous_status', NULL
+                ) ORDER BY id) INTO entries
+                FROM new_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT array_agg(json_build_object(
+                    'ticket_id', changed.id, 'status', changed.status,
+                    'previous_status', previous.status
+                ) ORDER BY changed.id) INTO entries
+                FROM new_rows changed
+                JOIN old_rows previous ON previous.id = changed.id;
+            ELSE
+                SELECT array_agg(json_build_object(
+                    'ticket_id', id, 'status', status, 'previous_status', NULL
+                ) ORDER BY id) INTO entries
+                FROM old_rows;
+            END IF;
+            PERFORM notify_ticket_entries('ticket', lower(TG_OP), entries);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # One entry per ticket with the ticket's current status, so that clients
+    # following a status receive the comments of its tickets too. Comments
+    # deleted by the cascade of a deleted ticket match no ticket any more and
+    # are covered by the ticket's own notification.
+    op.execute("""
+        CREATE FUNCTION notify_comment_changes() RETURNS trigger AS $$
+        DECLARE
+            entries json[];
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                SELECT array_agg(json_build_object(
+                    'ticket_id', id, 'status', status, 'previous_status', NULL
+                ) ORDER BY id) INTO entries
+                FROM tickets
+                WHERE id IN (SELECT ticket_id FROM old_rows);
+            ELSE
+                SELECT array_agg(json_build_object(
+                    'ticket_id', id, 'status', status, 'previous_status', NULL
+                ) ORDER BY id) INTO entries
+                FROM tickets
+                WHERE id IN (SELECT ticket_id FROM new_rows);
+            END IF;
+            PERFORM notify_ticket_entries('comment', lower(TG_OP), entries);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables allow a single event per trigger
+    for table, function in (
+        ('tickets', 'notify_ticket_changes'),
+        ('comments', 'notify_comment_changes'),
+    ):
+        for event, referencing in (
+            ('INSERT', 'NEW TABLE AS new_rows'),
+            ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+            ('DELETE', 'OLD TABLE AS old_rows'),
+        ):
+            op.execute(f"""
+                CREATE TRIGGER {table}_notify_{event.lower()}
+                AFTER {event} ON {table}
+                REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            """)
+
+
+def downgrade() -> None:
+    for table in ('comments', 'tickets'):
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_comment_changes()")
+    op.execute("DROP FUNCTION IF EXISTS notify_ticket_changes()")
+    op.execute("DROP FUNCTION IF EXISTS notify_ticket_entries(text, text, json[])")
@@ -1,16 +1,18 @@
-from app.ollama import create_openai_instance
+import asyncio
 
-with open("prompt.txt", "r", encoding="utf-8") as f:
-    system_prompt = f.read()
+from app.ollama import create_openai_instance
 
-    instance = create_openai_instance(system_prompt)
 
-    reply = instance("Как зарегистрироваться на платформе?")
+async def main():
+    with open("prompt.txt", "r", encoding="utf-8") as f:
+        system_prompt = f.read()
 
-    print(reply)
+    instance = create_openai_instance(system_prompt)
 
-    print()
+    for question in ("Как зарегистрироваться на платформе?", "Как добавить товар?"):
+        async for token in instance(question):
+            print(token, end="", flush=True)
+        print("\n")
 
-    reply = instance("Как добавить товар?")
 
-    print(reply)
\ No newline at end of file
+asyncio.run(main())
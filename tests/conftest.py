@@ -0,0 +1,25 @@
+import os
+
+from dotenv import load_dotenv
+
+# Settings groups are read on first use, some of them while `app` is being
+# imported, so the environment has to be ready before that. Values from .env
+# take precedence.
+load_dotenv()
+for key, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_NAME": "app_api",
+    "PRODUCTION": "false",
+    "SITE_URL": "http://localhost",
+    "SECRET_KEY": "test",
+    "METRICS": "false",
+    "MAIL_MAIN_ADDRESS": "test@localhost",
+    "MAIL_MAIN_ADDRESS_PASSWORD": "test",
+    "MAIL_HOST": "localhost",
+    "MAIL_PORT": "587",
+    "MAIL_TLS": "false",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,80 @@
+"""
+Self-checks of the benchmark suite that need no database or running server.
+"""
+
+import json
+import random
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.load import percentile, summarize
+from benchmarks.seed import make_comments, make_ticket
+from benchmarks.stub_llm import REPLY, create_app, tokenize
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(number) for number in range(1, 101)]
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.99) == 3
+    assert percentile([], 0.5) == 0
+
+
+def test_summarize_in_milliseconds() -> None:
+    summary = summarize([0.001, 0.002, 0.003, 0.004])
+    assert summary == {"p50": 2.0, "p95": 4.0, "p99": 4.0, "mean": 2.5, "max": 4.0}
+    assert summarize([]) == {}
+
+
+def test_seed_data_is_reproducible() -> None:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def generate(seed_value: int) -> list:
+        rng = random.Random(seed_value)
+        ticket = make_ticket(rng, created_at)
+        return [ticket, make_comments(rng, 1, created_at, 5)]
+
+    assert generate(42) == generate(42)
+    assert generate(42) != generate(43)
+
+
+async def test_stub_llm_streams_tokens_and_usage() -> None:
+    transport = httpx.ASGITransport(app=create_app(ttft=0, token_delay=0))
+    async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+        response = await client.post(
+            "/v1/chat/completions",
+            json={
+                "model": "stub",
+                "messages": [{"role": "user", "content": "Где мой заказ?"}],
+                "stream": True,
+                "stream_options": {"include_usage": True},
+            },
+        )
+
+    events = [
+        line.removeprefix("data: ")
+        for line in response.text.split("\n\n")
+        if line.startswith("data: ")
+    ]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    content = "".join(
+        chunk["choices"][0]["delta"].get("content", "")
+        for chunk in chunks
+        if chunk["choices"]
+    )
+    usage = chunks[-1]["usage"]
+    assert content == REPLY
+    assert usage["completion_tokens"] == len(tokenize(REPLY))
+
+
+async def test_stub_llm_answers_without_streaming() -> None:
+    transport = httpx.ASGITransport(app=create_app(ttft=0, token_delay=0, reply="Да"))
+    async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+        response = await client.post(
+            "/v1/chat/completions",
+            json={"messages": [{"role": "user", "content": "?"}], "stream": False},
+        )
+    assert response.json()["choices"][0]["message"]["content"] == "Да"
@@ -0,0 +1,164 @@
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Sequence
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.tickets.dependencies import get_tickets_service
+from app.tickets.schemas import TicketBulkCreate
+from app.tickets.services import TicketsService
+
+URL = "/api/v1/tickets/bulk"
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def ticket(number: int, **fields: Any) -> Dict[str, Any]:
+    return {
+        "title": f"Заказ {number}",
+        "description": "Не пришёл",
+        "status": "open",
+        "username": f"user{number}",
+        **fields,
+    }
+
+
+class StubService:
+    """Assigns increasing IDs in the order the tickets are passed."""
+
+    def __init__(self) -> None:
+        self.created: List[TicketBulkCreate] = []
+
+    async def create_many(self, tickets: Sequence[TicketBulkCreate]) -> List[int]:
+        start = len(self.created) + 100
+        self.created.extend(tickets)
+        return list(range(start, start + len(tickets)))
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(settings.app, "BULK_MAX_ROWS", 3)
+    monkeypatch.setattr(settings.app, "BULK_MAX_BYTES", 1000)
+    service = StubService()
+    app.dependency_overrides[get_tickets_service] = lambda: service
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        c.service = service
+        yield c
+    app.dependency_overrides.pop(get_tickets_service)
+
+
+async def test_json_array_ids_in_input_order(client) -> None:
+    payload = [ticket(1), ticket(2, comments=[{"text": "Где?", "username": "u"}])]
+    response = await client.post(URL, json=payload)
+    assert response.status_code == 201
+    assert response.json() == {"ids": [100, 101]}
+    assert [item.title for item in client.service.created] == ["Заказ 1", "Заказ 2"]
+    assert client.service.created[1].comments[0].text == "Где?"
+
+
+async def test_ndjson_ids_in_input_order(client) -> None:
+    body = "\n".join(json.dumps(ticket(number)) for number in (3, 1, 2))
+    response = await client.post(URL, content=body, headers=NDJSON)
+    assert response.status_code == 201
+    assert response.json() == {"ids": [100, 101, 102]}
+    assert [item.username for item in client.service.created] == [
+        "user3",
+        "user1",
+        "user2",
+    ]
+
+
+async def test_ndjson_errors_located_by_line(client) -> None:
+    # The blank line still counts, the locations match the lines of the body
+    body = "\n".join([json.dumps(ticket(1)), "", '{"title": 1}', "not json"])
+    response = await client.post(URL, content=body, headers=NDJSON)
+    assert response.status_code == 422
+    locations = {tuple(error["loc"][:2]) for error in response.json()["detail"]}
+    assert locations == {("body", 2), ("body", 3)}
+    assert client.service.created == []
+
+
+async def test_json_errors_located_by_index(client) -> None:
+    response = await client.post(URL, json=[ticket(1), {"title": "no fields"}])
+    assert response.status_code == 422
+    assert {tuple(error["loc"][:2]) for error in response.json()["detail"]} == {
+        ("body", 1)
+    }
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+async def test_too_many_rows(client, ndjson) -> None:
+    tickets = [ticket(number) for number in range(4)]
+    if ndjson:
+        body = "\n".join(json.dumps(item) for item in tickets)
+        response = await client.post(URL, content=body, headers=NDJSON)
+    else:
+        response = await client.post(URL, json=tickets)
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "too_long"
+    assert error["ctx"] == {"max_length": 3}
+    assert client.service.created == []
+
+
+async def test_body_too_large(client) -> None:
+    response = await client.post(URL, json=[ticket(1, description="x" * 1000)])
+    assert response.status_code == 413
+    assert client.service.created == []
+
+
+async def test_chunked_body_too_large(client) -> None:
+    async def chunks():
+        yield b"["
+        for number in range(3):
+            yield json.dumps(ticket(number, description="x" * 400)).encode() + b","
+        yield b"]"
+
+    # Without Content-Length the limit applies while the body is read
+    response = await client.post(URL, content=chunks())
+    assert response.status_code == 413
+    assert "content-length" not in response.request.headers
+
+
+class FakeRepository:
+    def __init__(self, ids: Sequence[int]) -> None:
+        self.ids = ids
+        self.rows: List[Dict[str, Any]] = []
+
+    async def create_many(self, rows: Sequence[Dict[str, Any]]):
+        self.rows.extend(rows)
+        return self.ids
+
+
+async def test_service_attaches_comments_to_their_tickets() -> None:
+    session = SimpleNamespace(commits=0)
+
+    async def commit() -> None:
+        session.commits += 1
+
+    session.commit = commit
+    service = TicketsService(session)
+    service.repository = FakeRepository([11, 12, 13])
+    service.comments_service.repository = FakeRepository([])
+    tickets = [
+        TicketBulkCreate(**ticket(1, comments=[{"text": "a", "username": "u"}])),
+        TicketBulkCreate(**ticket(2)),
+        TicketBulkCreate(
+            **ticket(3, comments=[{"text": "b", "username": "u"}] * 2)
+        ),
+    ]
+
+    assert await service.create_many(tickets) == [11, 12, 13]
+    assert [row["title"] for row in service.repository.rows] == [
+        "Заказ 1",
+        "Заказ 2",
+        "Заказ 3",
+    ]
+    assert [
+        (row["ticket_id"], row["text"])
+        for row in service.comments_service.repository.rows
+    ] == [(11, "a"), (13, "b"), (13, "b")]
+    assert session.commits == 1
@@ -0,0 +1,202 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+
+from app.core.lib.cache import CacheStatsCollector, MemoryCacheBackend, TTLCache
+from app.tickets.cache import ticket_cache_key
+from app.tickets.schemas import CommentCreate, TicketUpdate
+from app.tickets.services import TicketsService
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_entry_evicted() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+    # Setting again restarts the lifetime of the entry
+    cache.set("a", 2)
+    clock.now = 9.9
+    assert cache.get("a") == 2
+
+
+def test_counters_and_hit_ratio() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    assert cache.hit_ratio == 0.0
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+        "hit_ratio": pytest.approx(2 / 3),
+    }
+
+
+def test_zero_size_disables_cache() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+async def test_memory_backend_delete_and_clear() -> None:
+    backend = MemoryCacheBackend(max_size=10, ttl=60)
+    await backend.set("a", b"1")
+    await backend.set("b", b"2")
+    await backend.delete("a")
+    await backend.delete("missing")
+    assert await backend.get("a") is None
+    assert await backend.get("b") == b"2"
+    backend.clear()
+    assert await backend.get("b") is None
+
+
+def test_stats_collector_exports_every_cache() -> None:
+    collector = CacheStatsCollector()
+    ttl_cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.get("a")
+    ttl_cache.get("b")
+    collector.add("answers", ttl_cache)
+    collector.add("empty", MemoryCacheBackend(max_size=10, ttl=60))
+
+    samples = {
+        (sample.name, sample.labels["cache"]): sample.value
+        for metric in collector.collect()
+        for sample in metric.samples
+    }
+    assert samples[("cache_hits_total", "answers")] == 1
+    assert samples[("cache_misses_total", "answers")] == 1
+    assert samples[("cache_size", "answers")] == 1
+    assert samples[("cache_hit_ratio", "answers")] == 0.5
+    assert samples[("cache_hits_total", "empty")] == 0
+    # Only the stats a backend reports are exported
+    assert ("cache_errors_total", "answers") not in samples
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.sync_session = SimpleNamespace(info={})
+        self.commits = 0
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def make_ticket(ticket_id: int, status: str = "open") -> SimpleNamespace:
+    return SimpleNamespace(
+        id=ticket_id,
+        title="Заказ не пришёл",
+        description="Прошла неделя",
+        status=status,
+        username="user1",
+        created_at=NOW,
+        updated_at=NOW,
+        comments=[],
+    )
+
+
+class FakeTicketsRepository:
+    def __init__(self) -> None:
+        self.tickets: Dict[int, SimpleNamespace] = {1: make_ticket(1)}
+        self.loads: List[int] = []
+
+    async def get_by_id(self, ticket_id: int):
+        self.loads.append(ticket_id)
+        return self.tickets.get(ticket_id)
+
+    async def update(self, ticket_id: int, data: dict, load_comments: bool = False):
+        self.tickets[ticket_id] = make_ticket(ticket_id, data["status"])
+        return self.tickets[ticket_id]
+
+    async def delete(self, ticket_id: int) -> bool:
+        return self.tickets.pop(ticket_id, None) is not None
+
+    async def exists(self, ticket_id: int) -> bool:
+        return ticket_id in self.tickets
+
+
+class FakeCommentsRepository:
+    async def create(self, comment):
+        return comment
+
+
+@pytest.fixture
+def service() -> TicketsService:
+    service = TicketsService(FakeSession(), cache=MemoryCacheBackend(10, 60))
+    service.repository = FakeTicketsRepository()
+    service.comments_service.repository = FakeCommentsRepository()
+    return service
+
+
+async def test_cache_miss_read_from_primary_and_filled(service) -> None:
+    first = await service.get_cached(1)
+    second = await service.get_cached(1)
+
+    assert first == second
+    assert service.repository.loads == [1]
+    # The replica may lag behind the write that emptied the entry
+    assert service.session.sync_session.info["primary"] is True
+
+
+async def test_cache_hit_stays_on_replica(service) -> None:
+    await service.get_cached(1)
+    service.session.sync_session.info.clear()
+    await service.get_cached(1)
+    assert "primary" not in service.session.sync_session.info
+
+
+async def test_update_invalidates_cached_ticket(service) -> None:
+    await service.get_cached(1)
+    await service.update(1, TicketUpdate(status="closed"))
+
+    assert await service.cache.get(ticket_cache_key(1)) is None
+    assert (await service.get_cached(1)).status == "closed"
+    assert service.repository.loads == [1, 1]
+
+
+async def test_delete_invalidates_cached_ticket(service) -> None:
+    await service.get_cached(1)
+    await service.delete(1)
+    assert await service.cache.get(ticket_cache_key(1)) is None
+
+
+async def test_add_comment_invalidates_cached_ticket(service) -> None:
+    await service.get_cached(1)
+    await service.add_comment(1, CommentCreate(text="Есть новости?", username="u"))
+    assert await service.cache.get(ticket_cache_key(1)) is None
+    assert service.session.commits == 1
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from app.core.config import settings
+from app.core.database.notifications import NotificationListener
+from app.tickets import changes
+from app.tickets.changes import change_events, change_filter, format_event
+
+
+class FakeListener(NotificationListener):
+    """Listener without a database, notifications are passed to `notify`."""
+
+    async def _run(self) -> None:
+        self._connected.set()
+        await asyncio.Event().wait()
+
+    def notify(self, notification: Dict[str, Any]) -> None:
+        self._dispatch(None, 0, self.channel, json.dumps(notification))
+
+
+def notification(*entries: Dict[str, Any], kind: str = "ticket") -> Dict[str, Any]:
+    return {"type": kind, "action": "update", "changes": list(entries)}
+
+
+def change(ticket_id: int, status: str, previous_status: Any = None) -> Dict[str, Any]:
+    return {"ticket_id": ticket_id, "status": status, "previous_status": previous_status}
+
+
+@pytest.fixture
+async def listener():
+    listener = FakeListener("postgresql://unused", "ticket_changes", queue_size=2)
+    yield listener
+    await listener.stop()
+
+
+def test_no_filter_without_criteria() -> None:
+    assert change_filter([], []) is None
+
+
+def test_filter_keeps_matching_changes_only() -> None:
+    select = change_filter([1, 2], [])
+    selected = select(notification(change(1, "open"), change(3, "open")))
+    assert selected == notification(change(1, "open"))
+    assert select(notification(change(3, "open"))) is None
+
+
+def test_filter_on_status_includes_tickets_leaving_it() -> None:
+    select = change_filter([], ["open"])
+    entries = [change(1, "open"), change(2, "closed", "open"), change(3, "closed")]
+    assert select(notification(*entries)) == notification(*entries[:2])
+
+
+def test_filter_on_ticket_and_status() -> None:
+    select = change_filter([1], ["closed"])
+    assert select(notification(change(1, "open", "new"))) is None
+    assert select(notification(change(1, "closed", "open"))) is not None
+
+
+def test_format_event() -> None:
+    assert format_event("ticket", {"title": "Заказ"}) == (
+        'event: ticket\ndata: {"title": "Заказ"}\n\n'
+    )
+
+
+async def test_dispatch_applies_selector_per_subscriber(listener) -> None:
+    async with listener.subscribe() as everything, listener.subscribe(
+        change_filter([2], [])
+    ) as second:
+        listener.notify(notification(change(1, "open"), change(2, "open")))
+        listener.notify(notification(change(1, "closed")))
+
+        assert len((await everything.get(timeout=1))["changes"]) == 2
+        assert (await everything.get(timeout=1))["changes"] == [change(1, "closed")]
+        assert (await second.get(timeout=1))["changes"] == [change(2, "open")]
+        assert await second.get(timeout=0.01) is None
+
+
+async def test_invalid_payload_ignored(listener) -> None:
+    async with listener.subscribe() as subscription:
+        listener._dispatch(None, 0, listener.channel, "not json")
+        assert await subscription.get(timeout=0.01) is None
+        assert subscription.pop_missed() == 0
+
+
+async def test_full_queue_counts_missed(listener) -> None:
+    async with listener.subscribe() as subscription:
+        for ticket_id in range(4):
+            listener.notify(notification(change(ticket_id, "open")))
+
+        assert subscription.pop_missed() == 2
+        assert subscription.pop_missed() == 0
+        received = [await subscription.get(timeout=1) for _ in range(2)]
+        assert [item["changes"][0]["ticket_id"] for item in received] == [0, 1]
+
+
+async def test_change_events_stream(listener, monkeypatch) -> None:
+    monkeypatch.setattr(changes, "ticket_changes", listener)
+    monkeypatch.setattr(settings.app, "CHANGE_FEED_HEARTBEAT_SECONDS", 0.01)
+    events = change_events([1], [])
+    assert await events.__anext__() == "retry: 3000\n\n"
+    # Nothing changed within the heartbeat interval
+    assert await events.__anext__() == ": keep-alive\n\n"
+
+    # Three notifications overflow the queue of two: the client is told to reset
+    for ticket_id in (1, 1, 1):
+        listener.notify(notification(change(ticket_id, "open")))
+    received: List[str] = [await events.__anext__() for _ in range(3)]
+    await events.aclose()
+
+    assert received[0] == format_event("reset", {"missed": 1})
+    assert received[1] == format_event("ticket", notification(change(1, "open")))
+    assert received[2] == received[1]
@@ -0,0 +1,50 @@
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.lib.client_id import ClientIdMiddleware, get_client_id
+
+
+async def echo(request: Request) -> JSONResponse:
+    return JSONResponse({"client_id": get_client_id(request)})
+
+
+@pytest.fixture
+async def client():
+    app = Starlette(routes=[Route("/", echo, methods=["GET", "POST"])])
+    app.add_middleware(ClientIdMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def test_write_issues_cookie_used_by_later_reads(client) -> None:
+    anonymous = await client.get("/")
+    assert anonymous.json() == {"client_id": None}
+    assert "set-cookie" not in anonymous.headers
+
+    write = await client.post("/")
+    issued = write.json()["client_id"]
+    assert issued
+    assert write.cookies["client_id"] == issued
+    assert "HttpOnly" in write.headers["set-cookie"]
+
+    read = await client.get("/")
+    assert read.json() == {"client_id": issued}
+    assert "set-cookie" not in read.headers
+
+
+async def test_header_wins_over_cookie(client) -> None:
+    client.cookies["client_id"] = "cookie-client"
+    response = await client.post("/", headers={"X-Client-Id": "header-client"})
+    assert response.json() == {"client_id": "header-client"}
+    assert "set-cookie" not in response.headers
+
+
+@pytest.mark.parametrize("value", ["short", "x" * 65, "with spaces in it"])
+async def test_malformed_identifier_ignored(client, value) -> None:
+    response = await client.get("/", headers={"X-Client-Id": value})
+    assert response.json() == {"client_id": None}
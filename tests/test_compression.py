@@ -0,0 +1,221 @@
+"""
+Content negotiation middlewares: compression, MessagePack and their ETags.
+"""
+
+import asyncio
+import gzip
+import zlib
+from typing import List
+
+import httpx
+import msgpack
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.routing import Route
+from starlette.types import Message
+
+from app.core.lib.compression import CompressionMiddleware, parse_quality_values
+from app.core.lib.negotiation import MessagePackMiddleware
+
+ITEMS = [{"id": number, "title": "Заказ не пришёл вовремя"} for number in range(100)]
+ETAG = '"v1"'
+
+
+async def items(request: Request) -> Response:
+    if request.headers.get("if-none-match") == ETAG:
+        return Response(status_code=304, headers={"ETag": ETAG})
+    return JSONResponse(ITEMS, headers={"ETag": ETAG})
+
+
+async def small(request: Request) -> Response:
+    return PlainTextResponse("ok")
+
+
+async def encoded(request: Request) -> Response:
+    return Response(gzip.compress(b"x" * 2000), headers={"Content-Encoding": "gzip"})
+
+
+async def chunks():
+    for number in range(3):
+        yield b'{"line": %d}\n' % number * 100
+
+
+async def stream(request: Request) -> Response:
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+async def events(request: Request) -> Response:
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def create_app() -> Starlette:
+    app = Starlette(
+        routes=[
+            Route("/items", items),
+            Route("/small", small),
+            Route("/encoded", encoded),
+            Route("/stream", stream),
+            Route("/events", events),
+        ]
+    )
+    # Same order as create_default_fastapi_app: compression wraps MessagePack
+    app.add_middleware(MessagePackMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+def test_parse_quality_values() -> None:
+    assert parse_quality_values("br;q=0.5, GZIP, *;q=0, x;q=bad") == {
+        "br": 0.5,
+        "gzip": 1.0,
+        "*": 0.0,
+        "x": 0.0,
+    }
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+    ],
+)
+async def test_encoding_selection(client, accept_encoding, expected) -> None:
+    response = await client.get("/items", headers={"Accept-Encoding": accept_encoding})
+    assert response.headers.get("content-encoding") == expected
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == ITEMS
+
+
+async def test_small_body_not_compressed(client) -> None:
+    response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+async def test_encoded_response_passed_through(client) -> None:
+    response = await client.get("/encoded", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"x" * 2000
+
+
+async def test_event_stream_not_compressed(client) -> None:
+    response = await client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+async def test_stream_flushed_per_chunk() -> None:
+    middleware = CompressionMiddleware(create_app().router, minimum_size=500)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    messages: List[Message] = []
+    requested = False
+
+    async def receive() -> Message:
+        nonlocal requested
+        if requested:
+            # The client stays connected until the response is complete
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    # Every chunk decompresses on arrival, nothing waits for the end
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS + 16)
+    bodies = [message for message in messages[1:] if message.get("more_body")]
+    assert len(bodies) == 3
+    for number, message in enumerate(bodies):
+        assert decompressor.decompress(message["body"]) == (
+            b'{"line": %d}\n' % number * 100
+        )
+
+
+async def test_etag_suffixed_per_encoding(client) -> None:
+    identity = await client.get("/items", headers={"Accept-Encoding": "identity"})
+    compressed = await client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert identity.headers["etag"] == ETAG
+    assert compressed.headers["etag"] == '"v1-gzip"'
+
+    # The suffix is removed before the application compares the tag
+    revalidated = await client.get(
+        "/items",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": '"v1-gzip"'},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1-gzip"'
+
+    # A tag of another encoding does not validate this one
+    other = await client.get(
+        "/items", headers={"Accept-Encoding": "br", "If-None-Match": '"v1-gzip"'}
+    )
+    assert other.status_code == 200
+    assert other.headers["etag"] == '"v1-br"'
+
+
+async def test_msgpack_negotiation(client) -> None:
+    # httpx asks for compression by default, which would add its own suffix
+    client.headers["Accept-Encoding"] = "identity"
+    response = await client.get("/items", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == ITEMS
+    assert response.headers["etag"] == '"v1-msgpack"'
+    assert "Accept" in response.headers["vary"].split(", ")
+
+    preferred_json = await client.get(
+        "/items",
+        headers={"Accept": "application/json, application/msgpack;q=0.5"},
+    )
+    assert preferred_json.headers["content-type"] == "application/json"
+    assert preferred_json.headers["etag"] == ETAG
+    assert "Accept" in preferred_json.headers["vary"].split(", ")
+
+    not_json = await client.get("/small", headers={"Accept": "application/msgpack"})
+    assert not_json.text == "ok"
+
+
+async def test_msgpack_and_compression_etags_combine(client) -> None:
+    headers = {"Accept": "application/msgpack", "Accept-Encoding": "br"}
+    response = await client.get("/items", headers=headers)
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == '"v1-msgpack-br"'
+    assert msgpack.unpackb(response.content) == ITEMS
+
+    revalidated = await client.get(
+        "/items", headers={**headers, "If-None-Match": '"v1-msgpack-br"'}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1-msgpack-br"'
+
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import httpx
+import pytest
+
+from app.core.lib.cache import MemoryCacheBackend
+from app.core.lib.etag import etag_matches, make_etag
+from app.main import app
+from app.tickets.cache import ticket_cache_key
+from app.tickets.dependencies import get_tickets_service
+from app.tickets.services import TicketsService
+
+ETAG = make_etag("ticket", 1)
+UPDATED_AT = datetime(2025, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ("", False),
+        (ETAG, True),
+        (f"W/{ETAG}", True),
+        ("*", True),
+        (' "other" , W/"older",' + ETAG, True),
+        ('"other", W/"older"', False),
+        (ETAG.strip('"'), False),
+    ],
+)
+def test_etag_matches(if_none_match: Optional[str], expected: bool) -> None:
+    assert etag_matches(if_none_match, ETAG) is expected
+
+
+def test_make_etag_is_strong_and_depends_on_every_part() -> None:
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert make_etag("ticket", 1) == ETAG
+    assert make_etag("ticket", 2) != ETAG
+    assert make_etag("comments", 1) != ETAG
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.sync_session = SimpleNamespace(info={})
+
+
+class FakeTicketsRepository:
+    """One ticket whose comments are given, as the database would return it."""
+
+    def __init__(self, comment_ids: List[int]) -> None:
+        self.ticket = SimpleNamespace(
+            id=1,
+            title="Заказ не пришёл",
+            description="Прошла неделя",
+            status="open",
+            username="user1",
+            created_at=UPDATED_AT,
+            updated_at=UPDATED_AT,
+            comments=[
+                SimpleNamespace(
+                    id=comment_id,
+                    text="Есть новости?",
+                    username="user1",
+                    created_at=UPDATED_AT,
+                    ticket_id=1,
+                )
+                for comment_id in comment_ids
+            ],
+        )
+        self.loads = 0
+
+    async def get_by_id(self, ticket_id: int):
+        self.loads += 1
+        return self.ticket if ticket_id == 1 else None
+
+    async def get_version(
+        self, ticket_id: int
+    ) -> Optional[Tuple[datetime, Optional[int], int]]:
+        if ticket_id != 1:
+            return None
+        ids = [comment.id for comment in self.ticket.comments]
+        return SimpleNamespace(
+            tuple=lambda: (self.ticket.updated_at, max(ids, default=None), len(ids))
+        )
+
+
+def make_service(comment_ids: List[int]) -> TicketsService:
+    service = TicketsService(FakeSession(), cache=MemoryCacheBackend(10, 60))
+    service.repository = FakeTicketsRepository(comment_ids)
+    return service
+
+
+@pytest.mark.parametrize("comment_ids", [[], [3, 7, 5]])
+async def test_loaded_ticket_etag_equals_version_etag(comment_ids) -> None:
+    service = make_service(comment_ids)
+    version_etag = await service.get_ticket_etag(1)
+
+    loaded = await service.get_cached(1)
+    # The second read is served from the cached JSON
+    cached = await service.get_cached(1)
+    assert service.repository.loads == 1
+    assert service.ticket_etag(loaded) == version_etag
+    assert service.ticket_etag(cached) == version_etag
+
+    comments_etag = service.comments_etag(loaded.comments)
+    assert comments_etag == await service.get_comments_etag(1)
+
+
+@pytest.fixture
+async def client():
+    service = make_service([3])
+    app.dependency_overrides[get_tickets_service] = lambda: service
+    transport = httpx.ASGITransport(app=app)
+    # Compression would suffix the tags with the encoding
+    headers = {"Accept-Encoding": "identity"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", headers=headers
+    ) as c:
+        c.service = service
+        yield c
+    app.dependency_overrides.pop(get_tickets_service)
+
+
+async def test_get_ticket_revalidated(client) -> None:
+    response = await client.get("/api/v1/tickets/1")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()["id"] == 1
+
+    revalidated = await client.get(
+        "/api/v1/tickets/1", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert revalidated.content == b""
+
+    # A new comment changes the version: the full ticket is sent again
+    client.service.repository.ticket.comments.append(
+        SimpleNamespace(
+            id=9, text="Ответ", username="support", created_at=UPDATED_AT, ticket_id=1
+        )
+    )
+    await client.service.cache.delete(ticket_cache_key(1))
+    changed = await client.get("/api/v1/tickets/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()["comments"]) == 2
+
+
+async def test_get_missing_ticket(client) -> None:
+    response = await client.get("/api/v1/tickets/2", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
@@ -0,0 +1,101 @@
+"""
+Import-time budget of the application, measured with `python -X importtime`.
+
+Imports the framework stack the application cannot do without, then
+`app.main`, in a fresh interpreter and sums the cumulative times that
+importtime reports for the top-level imports of each. The check fails when the
+application's share grows past a fraction of the stack's time measured in the
+same run, or when a module that is meant to be imported lazily is loaded at
+startup. A ratio rather than the absolute budget first used here (in seconds)
+keeps the check tight on fast machines without making it flaky on slow ones.
+The fraction can be adjusted through IMPORT_TIME_MAX_RATIO.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# The application's own imports take about a third of the stack's time
+MAX_RATIO = float(os.environ.get("IMPORT_TIME_MAX_RATIO", "0.5"))
+RUNS = 3
+
+# Dependencies every request path needs, imported first as the baseline
+STACK_MODULES = (
+    "fastapi",
+    "pydantic_settings",
+    "prometheus_client",
+    "sqlalchemy.ext.asyncio",
+    "sqlalchemy.dialects.postgresql.asyncpg",
+)
+# Heavy dependencies only needed once a feature is actually used
+LAZY_MODULES = ("openai", "passlib", "prometheus_fastapi_instrumentator", "uvicorn")
+
+STACK_MARKER = "-- stack --"
+APP_MARKER = "-- app --"
+MEASURE = f"""
+import importlib, json, sys
+print({STACK_MARKER!r}, file=sys.stderr, flush=True)
+for name in {STACK_MODULES!r}:
+    importlib.import_module(name)
+print({APP_MARKER!r}, file=sys.stderr, flush=True)
+import app.main
+print(json.dumps(sorted(sys.modules)))
+"""
+# "import time: self [us] | cumulative | imported package", nested imports
+# are indented below the import that triggered them
+IMPORT_TIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure() -> Dict:
+    """Import times in seconds and the modules loaded, from a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", MEASURE],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    totals = {STACK_MARKER: 0, APP_MARKER: 0}
+    section = None
+    for line in result.stderr.splitlines():
+        if line in totals:
+            section = line
+            continue
+        match = IMPORT_TIME_LINE.match(line)
+        # Only top-level imports, their cumulative time includes the nested ones
+        if section is not None and match and not match.group(2):
+            totals[section] += int(match.group(1))
+    return {
+        "stack": totals[STACK_MARKER] / 1e6,
+        "app": totals[APP_MARKER] / 1e6,
+        "modules": json.loads(result.stdout.splitlines()[-1]),
+    }
+
+
+@pytest.fixture(scope="module")
+def runs() -> List[Dict]:
+    return [measure() for _ in range(RUNS)]
+
+
+def test_import_time_within_budget(runs) -> None:
+    # The best run, the others mostly measure noise of the machine
+    best = min(runs, key=lambda run: run["app"] / run["stack"])
+    ratio = best["app"] / best["stack"]
+    assert ratio <= MAX_RATIO, (
+        f"Importing app.main took {best['app']:.2f}s on top of"
+        f" {best['stack']:.2f}s for the framework stack, ratio {ratio:.2f}"
+        f" above {MAX_RATIO:.2f}"
+    )
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_module_imported_lazily(runs, module) -> None:
+    assert module not in runs[0]["modules"], f"{module} is imported at startup"
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.lib import logger as logger_module
+from app.core.lib.logger import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestContextFilter,
+    RequestLoggingMiddleware,
+    SamplingFilter,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FORK_WORKER = """
+import asyncio, os, sys
+from app.core.database.engine import recent_writers
+from app.core.lib.logger import configure_logging, main_logger
+from app.tickets.cache import ticket_cache
+
+configure_logging(queued=True)
+asyncio.run(ticket_cache.set("ticket:1", b"{}"))
+asyncio.run(recent_writers.set("client", b"1"))
+
+pid = os.fork()
+if pid == 0:
+    main_logger.info("logged by the child")
+    cached = asyncio.run(ticket_cache.get("ticket:1"))
+    writer = asyncio.run(recent_writers.get("client"))
+    print("child", cached, writer, flush=True)
+    sys.exit(0)
+os.waitpid(pid, 0)
+print("parent", asyncio.run(ticket_cache.get("ticket:1")), flush=True)
+"""
+
+
+def test_forked_worker_logs_and_starts_with_empty_caches() -> None:
+    result = subprocess.run(
+        [sys.executable, "-c", FORK_WORKER],
+        cwd=ROOT,
+        env={**os.environ, "CACHE_BACKEND": "memory"},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    # Written by the listener thread restarted in the child
+    assert "logged by the child" in result.stderr
+    assert result.stdout.splitlines() == ["child None None", "parent b'{}'"]
+
+
+def make_record(level: int = logging.INFO, msg: str = "Заказ %s", **extra):
+    record = logging.LogRecord("tickets", level, __file__, 1, msg, ("42",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_fields() -> None:
+    record = make_record(request_id="abc", method="GET", route="/{ticket_id}")
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry.pop("time").endswith("+00:00")
+    assert entry == {
+        "level": "INFO",
+        "logger": "tickets",
+        "message": "Заказ 42",
+        "request_id": "abc",
+        "method": "GET",
+        "route": "/{ticket_id}",
+    }
+
+
+def test_json_formatter_exception() -> None:
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = make_record(level=logging.ERROR, exc_info=sys.exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert "RuntimeError: boom" in entry["exception"]
+    assert "request_id" not in entry
+
+
+def test_sampling_per_level(monkeypatch) -> None:
+    sampling = SamplingFilter({logging.DEBUG: 0.0, logging.INFO: 0.5})
+    monkeypatch.setattr(logger_module.random, "random", lambda: 0.4)
+    assert not sampling.filter(make_record(logging.DEBUG))
+    assert sampling.filter(make_record(logging.INFO))
+    assert sampling.filter(make_record(logging.WARNING))
+    monkeypatch.setattr(logger_module.random, "random", lambda: 0.6)
+    assert not sampling.filter(make_record(logging.INFO))
+    # Levels without a rate are always kept
+    assert sampling.filter(make_record(logging.ERROR))
+
+
+def test_full_queue_drops_records() -> None:
+    handler = DroppingQueueHandler(queue.Queue(1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    # Formatted before queueing, the arguments may not be picklable
+    assert (queued.msg, queued.args) == ("Заказ 42", None)
+
+
+def test_queued_record_keeps_traceback_apart() -> None:
+    handler = DroppingQueueHandler(queue.Queue(1))
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        handler.handle(make_record(level=logging.ERROR, exc_info=sys.exc_info()))
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "Заказ 42"
+    assert queued.exc_info is None and "RuntimeError: boom" in queued.exc_text
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+        self.addFilter(RequestContextFilter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = ListHandler()
+    request_logger = logging.getLogger("tests.requests")
+    request_logger.addHandler(handler)
+    request_logger.setLevel(logging.INFO)
+    yield handler.records
+    request_logger.removeHandler(handler)
+
+
+@pytest.fixture
+async def client(records):
+    request_logger = logging.getLogger("tests.requests")
+
+    app = FastAPI()
+
+    # The route template is set on the scope by FastAPI's router
+    @app.get("/tickets/{ticket_id}", response_class=PlainTextResponse)
+    async def show(ticket_id: int, request: Request) -> str:
+        request_logger.info("handling")
+        return request.state.request_id
+
+    app.add_middleware(RequestLoggingMiddleware, logger=request_logger)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def test_request_id_propagated(client, records) -> None:
+    response = await client.get("/tickets/7", headers={"X-Request-ID": "req-1"})
+    assert response.text == "req-1"
+    assert response.headers["x-request-id"] == "req-1"
+
+    handling, completed = records
+    for record in (handling, completed):
+        assert record.request_id == "req-1"
+        assert record.method == "GET"
+        assert record.route == "/tickets/{ticket_id}"
+    assert completed.getMessage() == "request completed"
+    assert completed.status == 200
+    assert completed.latency_ms >= 0
+
+
+async def test_request_id_generated(client, records) -> None:
+    first = await client.get("/tickets/1")
+    second = await client.get("/missing")
+    assert first.headers["x-request-id"] == first.text
+    assert len(first.text) == 32
+    assert second.headers["x-request-id"] not in ("", first.text)
+    # Unmatched paths are logged by path
+    assert (records[-1].route, records[-1].status) == ("/missing", 404)
@@ -0,0 +1,42 @@
+"""
+Startup checks of `python -m app.main`, each in a fresh interpreter since
+settings and backends are built when `app.main` is imported.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BUILD_APP = """
+from app.main import app, check_server_settings
+from app.core.database.engine import recent_writers
+from app.tickets.cache import ticket_cache
+check_server_settings()
+print(type(ticket_cache).__name__, type(recent_writers).__name__)
+"""
+
+
+def build_app(env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", BUILD_APP],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_several_workers_with_redis() -> None:
+    result = build_app({"CACHE_BACKEND": "redis", "SERVER_WORKERS": "2"})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["RedisCacheBackend", "RedisCacheBackend"]
+
+
+def test_several_workers_without_shared_backend_refused() -> None:
+    result = build_app({"CACHE_BACKEND": "memory", "SERVER_WORKERS": "2"})
+    assert result.returncode == 1
+    assert "CACHE_BACKEND=redis" in result.stderr
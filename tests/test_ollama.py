@@ -0,0 +1,220 @@
+import hashlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+from openai import OpenAIError
+
+from app import ollama
+from app.core.config import settings
+from app.ollama import (
+    SUMMARY_PREFIX,
+    ChatHistory,
+    ChatSession,
+    answer_cache,
+    normalize_question,
+)
+
+SYSTEM_PROMPT = "Ты ассистент техподдержки маркетплейса. " * 20
+
+
+class FakeCompletions:
+    """Chat completions endpoint answering every call with the same reply."""
+
+    def __init__(self, reply: str, error: Optional[Exception] = None) -> None:
+        self.reply = reply
+        self.error = error
+        self.calls: List[Dict[str, Any]] = []
+
+    async def create(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        if kwargs.get("stream"):
+            return self._stream()
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def _stream(self):
+        for token in self.reply.split(" "):
+            delta = SimpleNamespace(content=token + " ")
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture(autouse=True)
+def fake_tokens(monkeypatch) -> None:
+    # One token per character keeps the arithmetic of the budget readable
+    monkeypatch.setattr(ollama, "estimate_tokens", len)
+
+
+@pytest.fixture
+def completions(monkeypatch) -> FakeCompletions:
+    completions = FakeCompletions("итог")
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ollama, "get_client", lambda: client)
+    return completions
+
+
+def exchange(history: ChatHistory, number: int) -> None:
+    # Ten tokens each
+    history.append(f"question{number:02d}", f"answer{number:04d}")
+
+
+def test_budget_excludes_system_prompt() -> None:
+    history = ChatHistory(SYSTEM_PROMPT, token_budget=40)
+    assert history.token_count == 0
+    exchange(history, 1)
+    assert history.token_count == 20
+    history.summary = "кратко"
+    assert history.token_count == 26
+
+
+def test_trim_drops_oldest_turns_to_target() -> None:
+    history = ChatHistory(SYSTEM_PROMPT, token_budget=40)
+    for number in range(4):
+        exchange(history, number)
+
+    dropped = history.trim()
+    # 80 tokens trimmed to at most 75% of the budget, 30, one pair at a time
+    assert [turn["content"] for turn in dropped] == [
+        "question00",
+        "answer0000",
+        "question01",
+        "answer0001",
+        "question02",
+        "answer0002",
+    ]
+    assert history.token_count == 20
+    assert history.trim() == []
+
+
+def test_trim_keeps_last_exchange() -> None:
+    history = ChatHistory(SYSTEM_PROMPT, token_budget=10)
+    history.append("q" * 50, "a" * 50)
+    assert history.trim() == []
+    assert len(history.turns) == 2
+
+
+def test_messages_carry_summary_after_system_prompt() -> None:
+    history = ChatHistory(SYSTEM_PROMPT, token_budget=40)
+    history.summary = "кратко"
+    exchange(history, 1)
+    messages = history.messages("new")
+    assert [message["role"] for message in messages] == [
+        "system",
+        "system",
+        "user",
+        "assistant",
+        "user",
+    ]
+    assert messages[1]["content"] == SUMMARY_PREFIX + "кратко"
+
+
+@pytest.fixture
+def session(monkeypatch) -> ChatSession:
+    monkeypatch.setattr(settings.llm, "HISTORY_TOKEN_BUDGET", 40)
+    monkeypatch.setattr(settings.llm, "HISTORY_SUMMARY", True)
+    session = ChatSession(SYSTEM_PROMPT)
+    for number in range(4):
+        exchange(session.history, number)
+    return session
+
+
+async def test_compaction_summarises_dropped_turns(session, completions) -> None:
+    session.history.summary = "раньше"
+    await session._compact()
+
+    assert session.history.summary == "итог"
+    assert len(session.history.turns) == 2
+    # The previous summary is folded into the new one
+    dialog = completions.calls[0]["messages"][1]["content"]
+    assert dialog.startswith(SUMMARY_PREFIX + "раньше\nuser: question00")
+    assert "question03" not in dialog
+
+
+async def test_compaction_without_summary(session, completions, monkeypatch) -> None:
+    monkeypatch.setattr(settings.llm, "HISTORY_SUMMARY", False)
+    await session._compact()
+    assert session.history.summary is None
+    assert len(session.history.turns) == 2
+    assert completions.calls == []
+
+
+async def test_failed_summary_drops_turns(session, completions) -> None:
+    completions.error = OpenAIError("model unavailable")
+    await session._compact()
+    assert session.history.summary is None
+    assert len(session.history.turns) == 2
+
+
+async def test_compaction_runs_before_next_message(session, completions) -> None:
+    [token async for token in session("next")]
+    # Over the budget after the reply, compacted in the background
+    assert session._compaction is not None
+    assert session.history.summary is None
+
+    [token async for token in session("again")]
+    assert [call.get("stream", False) for call in completions.calls] == [
+        True,
+        False,
+        True,
+    ]
+    assert completions.calls[2]["messages"][1]["content"] == SUMMARY_PREFIX + "итог"
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["Где мой заказ?", "  где   МОЙ заказ!!! ", "Где, мой заказ", "где мой\tзаказ?"],
+)
+def test_normalize_question(question: str) -> None:
+    assert normalize_question(question) == "где мой заказ"
+
+
+def test_normalize_question_folds_yo() -> None:
+    assert normalize_question("Пришёл ЧЁРНЫЙ товар") == "пришел черный товар"
+    assert normalize_question("Заказ №5-б") == "заказ 5 б"
+
+
+@pytest.fixture
+def empty_answer_cache():
+    answer_cache.clear()
+    yield answer_cache
+    answer_cache.clear()
+
+
+async def ask(session: ChatSession, question: str) -> str:
+    return "".join([token async for token in session(question)])
+
+
+async def test_first_question_answered_from_cache(
+    completions, empty_answer_cache
+) -> None:
+    first = await ask(ChatSession(SYSTEM_PROMPT), "Где мой заказ?")
+    other = ChatSession(SYSTEM_PROMPT)
+    second = await ask(other, "  где МОЙ заказ ")
+
+    assert second == first
+    assert len(completions.calls) == 1
+    # The cached answer still becomes part of the conversation
+    assert other.history.turns[-1] == {"role": "assistant", "content": first}
+    digest = hashlib.sha1(SYSTEM_PROMPT.encode()).hexdigest()
+    assert empty_answer_cache.get((digest, "где мой заказ")) == first
+
+
+async def test_cache_key_includes_system_prompt(
+    completions, empty_answer_cache
+) -> None:
+    await ask(ChatSession(SYSTEM_PROMPT), "Где мой заказ?")
+    await ask(ChatSession("Ты ассистент продавцов."), "Где мой заказ?")
+    assert len(completions.calls) == 2
+
+
+async def test_later_questions_not_cached(completions, empty_answer_cache) -> None:
+    session = ChatSession(SYSTEM_PROMPT)
+    await ask(session, "Здравствуйте")
+    await ask(session, "Где мой заказ?")
+    assert len(empty_answer_cache) == 1
+
+    # Asked first elsewhere, the question still goes to the model
+    await ask(ChatSession(SYSTEM_PROMPT), "Где мой заказ?")
+    assert len(completions.calls) == 3
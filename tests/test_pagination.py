@@ -0,0 +1,32 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import MAX_ID, decode_cursor, encode_cursor
+
+
+def forge(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2024, 1, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created_at, MAX_ID)) == (created_at, MAX_ID)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        '["2024-01-01T00:00:00", 1e999]',
+        '["2024-01-01T00:00:00", 9223372036854775808]',
+        '["2024-01-01T00:00:00", 0]',
+        '["2024-01-01T00:00:00", -5]',
+        '["not a date", 1]',
+        '["2024-01-01T00:00:00"]',
+        "{}",
+    ],
+)
+def test_forged_cursor_rejected(raw: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(forge(raw))
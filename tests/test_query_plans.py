@@ -0,0 +1,213 @@
+"""
+Query-plan regression checks for the tickets repositories.
+
+Every statement a repository method sends to Postgres is captured and
+replayed under `EXPLAIN` with sequential scans disabled. If the planner
+still has to fall back to a sequential scan on one of our tables, no index
+covers that access path and the test fails.
+
+Runs against the database configured through the DB_* variables and is
+skipped when it is not reachable.
+"""
+
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.engine import async_engine, async_session_maker
+from app.tickets.models import Comment, Ticket
+from app.tickets.repositories import CommentsRepository, TicketsRepository
+from app.tickets.schemas import SortOrder, TicketFilter
+from app.utils.alembic_helpers import apply_migrations
+
+CHECKED_TABLES = {"tickets", "comments"}
+AFTER = (datetime(2100, 1, 1, tzinfo=timezone.utc), 1)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated_database() -> None:
+    try:
+        apply_migrations()
+    except Exception as exc:  # noqa: B902
+        pytest.skip(f"Postgres is not available: {exc}")
+
+
+@pytest.fixture(autouse=True)
+async def dispose_engine() -> AsyncIterator[None]:
+    # asyncpg connections are bound to the event loop of the test
+    yield
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def ticket() -> AsyncIterator[Ticket]:
+    async with async_session_maker() as session:
+        ticket = Ticket(
+            title="Plan check", description="...", status="open", username="explain"
+        )
+        ticket.comments = [Comment(text="...", username="explain")]
+        session.add(ticket)
+        await session.commit()
+        yield ticket
+        await session.delete(ticket)
+        await session.commit()
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[AsyncSession]:
+    async with async_session_maker() as session:
+        yield session
+
+
+@asynccontextmanager
+async def captured_statements() -> AsyncIterator[List[Tuple[str, Any]]]:
+    statements: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+def seq_scans(plan: dict) -> List[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def assert_no_seq_scans(statements: List[Tuple[str, Any]]) -> None:
+    assert statements, "repository method did not hit the database"
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = seq_scans(plan[0]["Plan"])
+            assert not scans, f"sequential scan on {scans} for:\n{statement}"
+        await conn.rollback()
+
+
+@pytest.mark.parametrize("order", list(SortOrder))
+@pytest.mark.parametrize(
+    "filters",
+    [
+        TicketFilter(),
+        TicketFilter(status="open"),
+        TicketFilter(username="explain"),
+    ],
+    ids=["unfiltered", "status", "username"],
+)
+@pytest.mark.parametrize("after", [None, AFTER], ids=["first", "next"])
+async def test_get_page(ticket, session, filters, order, after) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).get_page(filters, 21, after, order)
+    await assert_no_seq_scans(statements)
+
+
+@pytest.mark.parametrize("order", list(SortOrder))
+async def test_get_summary_page(ticket, session, order) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).get_summary_page(
+            TicketFilter(status="open"), 21, AFTER, order
+        )
+    await assert_no_seq_scans(statements)
+
+
+@pytest.mark.parametrize(
+    "filters", [TicketFilter(), TicketFilter(username="explain")], ids=["all", "username"]
+)
+async def test_stream(ticket, session, filters) -> None:
+    async with captured_statements() as statements:
+        async for _ in TicketsRepository(session).stream(filters, 100):
+            pass
+    await assert_no_seq_scans(statements)
+
+
+async def test_search(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).search("plan check", 21, 0)
+    await assert_no_seq_scans(statements)
+
+
+async def test_search_headlines(session) -> None:
+    ticket = Ticket(
+        title="Посылка потерялась",
+        description="Жду уже месяц.",
+        status="open",
+        username="explain",
+    )
+    ticket.comments = [
+        Comment(text="Посылка застряла на таможне, ждём документы.", username="support")
+    ]
+    session.add(ticket)
+    await session.commit()
+    try:
+        repository = TicketsRepository(session)
+        async with captured_statements() as statements:
+            by_comment = await repository.search("таможня", 21, 0)
+        await assert_no_seq_scans(statements)
+        by_title = await repository.search("потерялась", 21, 0)
+    finally:
+        await session.delete(ticket)
+        await session.commit()
+
+    headlines = {row.id: row.headline for row in by_comment}
+    assert "<b>таможне</b>" in headlines[ticket.id]
+    headlines = {row.id: row.headline for row in by_title}
+    assert "<b>потерялась</b>" in headlines[ticket.id]
+
+
+async def test_get_by_id(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).get_by_id(ticket.id)
+    await assert_no_seq_scans(statements)
+
+
+async def test_update(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).update(
+            ticket.id, {"status": "closed"}, load_comments=True
+        )
+    await session.rollback()
+    await assert_no_seq_scans(statements)
+
+
+async def test_delete(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).delete(ticket.id)
+    await session.rollback()
+    await assert_no_seq_scans(statements)
+
+
+async def test_exists(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).exists(ticket.id)
+    await assert_no_seq_scans(statements)
+
+
+async def test_get_version(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await TicketsRepository(session).get_version(ticket.id)
+    await assert_no_seq_scans(statements)
+
+
+async def test_get_comments_by_ticket_id(ticket, session) -> None:
+    async with captured_statements() as statements:
+        await CommentsRepository(session).get_by_ticket_id(ticket.id)
+    await assert_no_seq_scans(statements)
@@ -0,0 +1,95 @@
+"""
+Read routing of RoutingSession, with two SQLite databases standing in for the
+primary and a replica. Each holds one row naming it.
+"""
+
+import pytest
+from sqlalchemy import column, insert, select, table, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import engine as engine_module
+from app.core.database.engine import async_session_maker, pin_to_primary, routed_session
+from app.core.lib.cache import MemoryCacheBackend
+
+node = table("node", column("name"))
+WHICH = select(node.c.name)
+
+
+@pytest.fixture
+async def databases(tmp_path, monkeypatch):
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/{name}.db")
+        async with engines[name].begin() as connection:
+            await connection.execute(text("CREATE TABLE node (name TEXT)"))
+            await connection.execute(insert(node).values(name=name))
+    monkeypatch.setattr(engine_module, "async_engine", engines["primary"])
+    monkeypatch.setattr(engine_module, "replica_engines", [engines["replica"]])
+    monkeypatch.setattr(
+        engine_module, "recent_writers", MemoryCacheBackend(max_size=10, ttl=60)
+    )
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+async def test_plain_select_read_from_replica(databases) -> None:
+    async with async_session_maker() as session:
+        assert await session.scalar(WHICH) == "replica"
+        assert await session.scalar(WHICH) == "replica"
+        assert "primary" not in session.sync_session.info
+
+
+async def test_write_pins_session_to_primary(databases) -> None:
+    async with async_session_maker() as session:
+        await session.execute(insert(node).values(name="written"))
+        # Reads its own write
+        rows = (await session.scalars(WHICH)).all()
+        assert rows == ["primary", "written"]
+        assert session.sync_session.info["wrote"] is True
+
+
+async def test_locking_and_textual_statements_go_to_primary(databases) -> None:
+    async with async_session_maker() as session:
+        assert await session.scalar(WHICH.with_for_update()) == "primary"
+    async with async_session_maker() as session:
+        assert await session.scalar(text("SELECT name FROM node")) == "primary"
+
+
+async def test_pin_to_primary(databases) -> None:
+    async with async_session_maker() as session:
+        pin_to_primary(session)
+        assert await session.scalar(WHICH) == "primary"
+        assert "wrote" not in session.sync_session.info
+
+
+async def test_recent_writer_kept_on_primary(databases) -> None:
+    async with routed_session("writer") as session:
+        await session.execute(insert(node).values(name="written"))
+        await session.commit()
+
+    async with routed_session("writer") as session:
+        assert await session.scalar(WHICH) == "primary"
+    async with routed_session("reader") as session:
+        assert await session.scalar(WHICH) == "replica"
+    # Anonymous clients are never tracked
+    async with routed_session(None) as session:
+        await session.execute(insert(node).values(name="anonymous"))
+    async with routed_session(None) as session:
+        assert await session.scalar(WHICH) == "replica"
+
+
+async def test_reads_do_not_mark_writers(databases) -> None:
+    async with routed_session("reader") as session:
+        await session.scalar(WHICH)
+    assert await engine_module.recent_writers.get("reader") is None
+
+
+async def test_writers_forgotten_after_window(databases, monkeypatch) -> None:
+    monkeypatch.setattr(
+        engine_module, "recent_writers", MemoryCacheBackend(max_size=10, ttl=0)
+    )
+    async with routed_session("writer") as session:
+        await session.execute(insert(node).values(name="written"))
+    async with routed_session("writer") as session:
+        assert await session.scalar(WHICH) == "replica"
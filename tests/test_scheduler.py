@@ -0,0 +1,118 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.core.lib.scheduler import ConcurrencyLimiter, QueueFullError
+
+
+async def hold(limiter: ConcurrencyLimiter, release: asyncio.Event) -> None:
+    async with limiter.slot():
+        await release.wait()
+
+
+async def start(coroutine) -> asyncio.Task:
+    """Starts a task and lets it run up to its first wait."""
+    task = asyncio.create_task(coroutine)
+    await asyncio.sleep(0)
+    return task
+
+
+async def test_waiters_served_in_arrival_order() -> None:
+    limiter = ConcurrencyLimiter(concurrency=1, queue_size=5)
+    release = asyncio.Event()
+    order: List[int] = []
+    positions: List[int] = []
+
+    async def wait(number: int) -> None:
+        async def on_queued(position: int) -> None:
+            positions.append(position)
+
+        async with limiter.slot(on_queued):
+            order.append(number)
+
+    holder = await start(hold(limiter, release))
+    waiters = [await start(wait(number)) for number in range(3)]
+    assert limiter.queued == 3
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    assert order == [0, 1, 2]
+    assert positions == [1, 2, 3]
+    assert (limiter.active, limiter.queued) == (0, 0)
+
+
+async def test_full_queue_rejects() -> None:
+    limiter = ConcurrencyLimiter(concurrency=1, queue_size=1)
+    release = asyncio.Event()
+    holder = await start(hold(limiter, release))
+    waiter = await start(hold(limiter, release))
+
+    with pytest.raises(QueueFullError):
+        async with limiter.slot():
+            pass
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert (limiter.active, limiter.queued) == (0, 0)
+
+
+async def test_waiter_cancelled_before_hand_off() -> None:
+    limiter = ConcurrencyLimiter(concurrency=1, queue_size=5)
+    release = asyncio.Event()
+    holder = await start(hold(limiter, release))
+    cancelled = await start(hold(limiter, release))
+    served = await start(hold(limiter, release))
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert limiter.queued == 1
+
+    release.set()
+    await asyncio.gather(holder, served)
+    assert (limiter.active, limiter.queued) == (0, 0)
+
+
+async def test_waiter_cancelled_right_after_hand_off() -> None:
+    limiter = ConcurrencyLimiter(concurrency=1, queue_size=5)
+    holder_release, cancelled_release = asyncio.Event(), asyncio.Event()
+    holder = await start(hold(limiter, holder_release))
+    cancelled = await start(hold(limiter, cancelled_release))
+    served_release = asyncio.Event()
+    served = await start(hold(limiter, served_release))
+
+    # The holder hands its slot to the first waiter, which is cancelled
+    # before it gets to run: the slot has to move on to the next waiter
+    holder_release.set()
+    await asyncio.sleep(0)
+    assert holder.done() and not cancelled.done()
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    await asyncio.sleep(0)
+    assert (limiter.active, limiter.queued) == (1, 0)
+
+    served_release.set()
+    await served
+    assert (limiter.active, limiter.queued) == (0, 0)
+
+
+async def test_failing_on_queued_callback_does_not_leak() -> None:
+    limiter = ConcurrencyLimiter(concurrency=1, queue_size=5)
+    release = asyncio.Event()
+    holder = await start(hold(limiter, release))
+
+    async def on_queued(position: int) -> None:
+        raise RuntimeError("client went away")
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot(on_queued):
+            pass
+    assert (limiter.active, limiter.queued) == (1, 0)
+
+    release.set()
+    await holder
+    assert (limiter.active, limiter.queued) == (0, 0)
+    async with limiter.slot():
+        assert limiter.active == 1